@@ -0,0 +1,50 @@
+"""add users.created_at and unverified purge index
+
+Revision ID: 9c3e7a51d2f4
+Revises: ad20852ef0dc
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3e7a51d2f4"
+down_revision: Union[str, Sequence[str], None] = "ad20852ef0dc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite не умеет ADD COLUMN с CURRENT_TIMESTAMP, batch пересоздаёт таблицу
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("(CURRENT_TIMESTAMP)"),
+                nullable=False,
+            )
+        )
+
+    op.create_index(
+        "ix_users_unverified_created_at",
+        "users",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("NOT email_verified"),
+        sqlite_where=sa.text("NOT email_verified"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_unverified_created_at", table_name="users")
+
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("created_at")
@@ -0,0 +1,69 @@
+"""Простой генератор нагрузки для сравнения режимов запуска.
+
+    python -m benchmarks.http_throughput http://127.0.0.1:8000/ \\
+        --concurrency 64 --duration 10
+
+Каждое из --concurrency соединений держит keep-alive и шлёт GET-запросы
+друг за другом в течение --duration секунд.
+"""
+
+import argparse
+import asyncio
+import time
+
+from urllib.parse import urlsplit
+
+
+async def worker(host: str, port: int, path: str, deadline: float) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+    done = 0
+
+    while time.perf_counter() < deadline:
+        writer.write(request)
+        await writer.drain()
+
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in headers.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+
+        done += 1
+
+    writer.close()
+    await writer.wait_closed()
+
+    return done
+
+
+async def run(url: str, concurrency: int, duration: float) -> None:
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + duration
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            worker(parts.hostname, parts.port or 80, parts.path or "/", deadline)
+            for _ in range(concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - started_at
+
+    total = sum(results)
+    print(f"{total} запросов за {elapsed:.1f} с: {total / elapsed:.0f} запросов/с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
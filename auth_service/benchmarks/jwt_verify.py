@@ -0,0 +1,70 @@
+"""Сравнение стоимости проверки access-токена с кешем и без него.
+
+Запуск из каталога auth_service:
+
+    python -m benchmarks.jwt_verify --iterations 5000
+"""
+
+import argparse
+import time
+
+from authx import AuthX, AuthXConfig, RequestToken
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+from src.auth import CachedAuthX
+
+
+def generate_keys(algorithm: str) -> tuple[str, str]:
+    if algorithm.startswith("RS"):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+
+    return private_pem.decode(), public_pem.decode()
+
+
+def measure(security: AuthX, token: str, iterations: int) -> float:
+    request_token = RequestToken(token=token, type="access", location="headers")
+
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        security.verify_token(request_token, verify_csrf=False)
+
+    return (time.perf_counter() - started_at) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algorithm", default="RS256")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    private_key, public_key = generate_keys(args.algorithm)
+    config = AuthXConfig(
+        JWT_ALGORITHM=args.algorithm,
+        JWT_PRIVATE_KEY=private_key,
+        JWT_PUBLIC_KEY=public_key,
+    )
+
+    plain = AuthX(config=config)
+    cached = CachedAuthX(config=config)
+    token = plain.create_access_token(uid="1")
+
+    for name, security in (("без кеша", plain), ("с кешем", cached)):
+        per_call = measure(security, token, args.iterations)
+        print(f"{args.algorithm} {name}: {per_call * 1_000_000:.1f} мкс/проверка")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,81 @@
+from contextlib import asynccontextmanager
+
 from authx.exceptions import JWTDecodeError, MissingTokenError
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 
 from src import exceptions
-from src.routers import router as auth_router
+from src.auth import CachedAuthX
+from src.blacklist import token_blacklist
+from src.dependencies import MetricsAccessDep
+from src.families import load_family_scripts
+from src.hasher import PasswordHasherBusyError, password_hasher
+from src.purge import unverified_purger
+from src.rate_limit import load_rate_limit_scripts
+from src.redis import close_redis, init_redis
+from src.routers import outbox_relay, router as auth_router
+from src.services import user_cache, user_flight
+from src.settings import key_ring, security, settings
+from src.tokens import load_token_scripts
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    password_hasher.start()
+    await key_ring.start()
+    await init_redis()
+    await load_token_scripts()
+    await load_rate_limit_scripts()
+    await load_family_scripts()
+    await token_blacklist.start()
+    if settings.PURGE_ENABLED:
+        await unverified_purger.start()
+    yield
+    await unverified_purger.stop()
+    await token_blacklist.stop()
+    await close_redis()
+    await key_ring.stop()
+    password_hasher.shutdown()
+
 
 app = FastAPI(
     title="Auth Service",
     description="Сервис аутентификации",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(auth_router, prefix="/api/v1", tags=["auth"])
 app.add_exception_handler(JWTDecodeError, exceptions.jwt_decode_error_handler)
 app.add_exception_handler(MissingTokenError, exceptions.missing_token_error_handler)
+app.add_exception_handler(
+    PasswordHasherBusyError,
+    exceptions.password_hasher_busy_error_handler,
+)
 
 
 @app.get("/")
 async def ping():
     return {"message": "PONG", "service": "auth-service"}
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks(response: Response):
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_MAX_AGE}"
+    return key_ring.jwks()
+
+
+@app.get("/metrics", dependencies=[MetricsAccessDep])
+async def metrics():
+    return {
+        "password_hasher": password_hasher.stats.as_dict(),
+        "user_cache": user_cache.stats.as_dict(),
+        "user_flight": user_flight.stats.as_dict(),
+        "token_blacklist": token_blacklist.stats.as_dict(),
+        "outbox": outbox_relay.stats.as_dict(),
+        "purge": unverified_purger.stats.as_dict(),
+        "jwt_cache": (
+            security.token_cache.stats.as_dict()
+            if isinstance(security, CachedAuthX)
+            else None
+        ),
+    }
@@ -0,0 +1,106 @@
+"""Служебные команды сервиса.
+
+Импорт пользователей из CSV (заголовок email,username,password,...) или
+JSONL (один объект на строку). Файл читается потоково пачками по
+--batch-size строк, пароли хешируются в пуле процессов, пачка вставляется
+одним executemany; уже существующие email/username пропускаются. Вместо
+password можно передать готовый bcrypt-хеш в password_hash. Отклоняются
+строки с хешем другого формата, с обоими полями сразу и с username без
+пароля.
+
+    python manage.py import-users users.csv
+    python manage.py import-users users.jsonl --format jsonl --workers 8
+
+Подбор стоимости bcrypt под железо: хешируется пароль с растущим числом
+раундов, пока медиана не превысит целевую задержку. Найденное значение
+задаётся в BCRYPT_ROUNDS; хеши со старой стоимостью пересчитываются при
+следующем входе пользователя.
+
+    python manage.py calibrate-bcrypt --target-ms 250
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.db import engine
+from src.importer import FORMATS, UserImporter
+from src.settings import settings
+from src.utils import hash_password
+
+
+async def import_users(args: argparse.Namespace) -> None:
+    file_format = args.file_format or args.path.suffix.lstrip(".")
+    if file_format not in FORMATS:
+        sys.exit(f"Не удалось определить формат '{args.path}', укажите --format")
+
+    with (
+        ProcessPoolExecutor(max_workers=args.workers) as executor,
+        args.path.open(encoding="utf-8", newline="") as file,
+    ):
+        importer = UserImporter(
+            executor=executor,
+            workers=args.workers,
+            rounds=settings.BCRYPT_ROUNDS,
+            batch_size=args.batch_size,
+        )
+        try:
+            stats = await importer.run(file, file_format)
+        finally:
+            await engine.dispose()
+
+    print(stats.as_dict())
+
+
+async def calibrate_bcrypt(args: argparse.Namespace) -> None:
+    chosen = None
+
+    for rounds in range(args.min_rounds, 32):
+        timings = []
+        for _ in range(args.samples):
+            started_at = time.perf_counter()
+            hash_password("calibration-password", rounds)
+            timings.append((time.perf_counter() - started_at) * 1000)
+
+        median = statistics.median(timings)
+        print(f"rounds={rounds}: {median:.1f} мс")
+
+        if median > args.target_ms:
+            break
+        chosen = rounds
+
+    if chosen is None:
+        sys.exit(f"Даже {args.min_rounds} раундов дольше {args.target_ms} мс")
+
+    print(f"BCRYPT_ROUNDS={chosen} (сейчас {settings.BCRYPT_ROUNDS})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-users")
+    import_parser.add_argument("path", type=Path)
+    import_parser.add_argument("--format", dest="file_format", choices=FORMATS)
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    import_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    import_parser.set_defaults(handler=import_users)
+
+    calibrate_parser = commands.add_parser("calibrate-bcrypt")
+    calibrate_parser.add_argument("--target-ms", type=float, default=250.0)
+    calibrate_parser.add_argument("--min-rounds", type=int, default=10)
+    calibrate_parser.add_argument("--samples", type=int, default=5)
+    calibrate_parser.set_defaults(handler=calibrate_bcrypt)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
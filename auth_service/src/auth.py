@@ -0,0 +1,147 @@
+import hashlib
+
+from typing import Any
+
+import jwt
+
+from authx import AuthX, AuthXConfig, RequestToken, TokenPayload
+from authx.exceptions import JWTDecodeError
+
+from .cache import TTLCache
+from .keys import KeyRing
+
+
+class KeyRingAuthX(AuthX):
+    def __init__(
+        self,
+        config: AuthXConfig,
+        key_ring: KeyRing | None = None,
+    ) -> None:
+        super().__init__(config=config)
+        self.key_ring = key_ring
+
+    def _create_token(
+        self,
+        uid: str,
+        type: str,
+        fresh: bool = False,
+        headers: dict[str, Any] | None = None,
+        expiry=None,
+        data: dict[str, Any] | None = None,
+        audience=None,
+        **kwargs: Any,
+    ) -> str:
+        if self.key_ring is None:
+            return super()._create_token(
+                uid=uid,
+                type=type,
+                fresh=fresh,
+                headers=headers,
+                expiry=expiry,
+                data=data,
+                audience=audience,
+                **kwargs,
+            )
+
+        payload = self._create_payload(
+            uid=uid,
+            type=type,
+            fresh=fresh,
+            expiry=expiry,
+            data=data,
+            audience=audience,
+            **kwargs,
+        )
+
+        return payload.encode(
+            key=self.key_ring.signing_key,
+            algorithm=self.config.JWT_ALGORITHM,
+            headers=(headers or {}) | {"kid": self.key_ring.signing_kid},
+            data=data,
+        )
+
+    def verify_token(
+        self,
+        token: RequestToken,
+        verify_type: bool = True,
+        verify_fresh: bool = False,
+        verify_csrf: bool = True,
+    ) -> TokenPayload:
+        if self.key_ring is None:
+            return super().verify_token(
+                token,
+                verify_type=verify_type,
+                verify_fresh=verify_fresh,
+                verify_csrf=verify_csrf,
+            )
+
+        try:
+            kid = jwt.get_unverified_header(token.token).get("kid")
+        except jwt.PyJWTError as e:
+            raise JWTDecodeError(*e.args)
+
+        key = self.key_ring.public_key(kid)
+        if key is None:
+            raise JWTDecodeError(f"Неизвестный kid '{kid}'")
+
+        return token.verify(
+            key=key,
+            algorithms=[self.config.JWT_ALGORITHM],
+            verify_fresh=verify_fresh,
+            verify_type=verify_type,
+            verify_csrf=verify_csrf,
+            audience=self.config.JWT_DECODE_AUDIENCE,
+            issuer=self.config.JWT_DECODE_ISSUER,
+        )
+
+
+class CachedAuthX(KeyRingAuthX):
+    def __init__(
+        self,
+        config: AuthXConfig,
+        key_ring: KeyRing | None = None,
+        cache_maxsize: int = 10_000,
+    ) -> None:
+        super().__init__(config=config, key_ring=key_ring)
+        self.token_cache = TTLCache(maxsize=cache_maxsize, ttl=float("inf"))
+
+    def verify_token(
+        self,
+        token: RequestToken,
+        verify_type: bool = True,
+        verify_fresh: bool = False,
+        verify_csrf: bool = True,
+    ) -> TokenPayload:
+        if verify_csrf:
+            return super().verify_token(
+                token,
+                verify_type=verify_type,
+                verify_fresh=verify_fresh,
+                verify_csrf=verify_csrf,
+            )
+
+        key = (
+            hashlib.sha256(token.token.encode()).digest(),
+            token.type,
+            verify_type,
+            verify_fresh,
+            self.key_ring.version if self.key_ring is not None else 0,
+        )
+
+        payload = self.token_cache.get(key)
+        if payload is not None:
+            return payload
+
+        payload = super().verify_token(
+            token,
+            verify_type=verify_type,
+            verify_fresh=verify_fresh,
+            verify_csrf=verify_csrf,
+        )
+
+        if payload.exp is not None:
+            ttl = payload.time_until_expiry.total_seconds()
+            if ttl > 0:
+                self.token_cache.set(key, payload, ttl=ttl)
+
+        return payload
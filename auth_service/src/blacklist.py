@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+from dataclasses import asdict, dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .redis import redis_client
+from .settings import settings
+
+BLACKLIST_PREFIX = "blacklist:"
+BLACKLIST_CHANNEL = "blacklist_events"
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+    ) -> None:
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+@dataclass
+class BlacklistStats:
+    local_negatives: int = 0
+    redis_checks: int = 0
+    false_positives: int = 0
+    rebuilds: int = 0
+    listener_failures: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class TokenBlacklist:
+    def __init__(
+        self,
+        cache: Redis,
+        capacity: int,
+        error_rate: float,
+        rebuild_interval: int,
+    ) -> None:
+        self.cache = cache
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self.stats = BlacklistStats()
+        self.synced = False
+
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._rebuilding: BloomFilter | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+        self.synced = False
+
+    async def add(self, jti: str, exat: int) -> None:
+        await self.cache.set(name=BLACKLIST_PREFIX + jti, value=1, exat=exat)
+        self._add_local(jti)
+        await self.cache.publish(BLACKLIST_CHANNEL, jti)
+
+    async def contains(self, jti: str) -> bool:
+        if self.synced and jti not in self._bloom:
+            self.stats.local_negatives += 1
+            return False
+
+        self.stats.redis_checks += 1
+        found = bool(await self.cache.exists(BLACKLIST_PREFIX + jti))
+
+        if self.synced and not found:
+            self.stats.false_positives += 1
+
+        return found
+
+    def _add_local(self, jti: str) -> None:
+        self._bloom.add(jti)
+        if self._rebuilding is not None:
+            self._rebuilding.add(jti)
+
+    async def _rebuild(self) -> None:
+        self._rebuilding = BloomFilter(self.capacity, self.error_rate)
+        try:
+            async for key in self.cache.scan_iter(
+                match=BLACKLIST_PREFIX + "*",
+                count=1000,
+            ):
+                self._rebuilding.add(key.decode().removeprefix(BLACKLIST_PREFIX))
+            self._bloom = self._rebuilding
+        finally:
+            self._rebuilding = None
+
+        self.stats.rebuilds += 1
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.cache.pubsub() as pubsub:
+                    await pubsub.subscribe(BLACKLIST_CHANNEL)
+                    await self._rebuild()
+                    rebuilt_at = time.monotonic()
+                    self.synced = True
+
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True,
+                            timeout=1.0,
+                        )
+                        if message is not None:
+                            self._add_local(message["data"].decode())
+
+                        if time.monotonic() - rebuilt_at > self.rebuild_interval:
+                            await self._rebuild()
+                            rebuilt_at = time.monotonic()
+            except RedisError as e:
+                self.stats.listener_failures += 1
+                logger.warning(f"Подписка на {BLACKLIST_CHANNEL} потеряна: {e!r}")
+            except Exception:
+                self.stats.listener_failures += 1
+                logger.exception("Слушатель чёрного списка упал, перезапускаем")
+            finally:
+                # без подписки фильтр отстаёт — до пересборки проверяем в Redis
+                self.synced = False
+
+            await asyncio.sleep(1)
+
+
+token_blacklist = TokenBlacklist(
+    cache=redis_client,
+    capacity=settings.BLACKLIST_BLOOM_CAPACITY,
+    error_rate=settings.BLACKLIST_BLOOM_ERROR_RATE,
+    rebuild_interval=settings.BLACKLIST_BLOOM_REBUILD_INTERVAL,
+)
@@ -1,14 +1,20 @@
+from itertools import cycle
 from typing import Annotated, AsyncGenerator
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from .engine import create_engine
 from .settings import settings
 
-engine = create_async_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL)
+replica_engines = [create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
 
 Session = async_sessionmaker(engine, expire_on_commit=False)
+replica_sessions = cycle(
+    [async_sessionmaker(e, expire_on_commit=False) for e in replica_engines]
+)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -19,5 +25,19 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 
+async def get_read_session(
+    session: SessionDep,
+) -> AsyncGenerator[AsyncSession, None]:
+    if not replica_engines:
+        yield session
+        return
+
+    async with next(replica_sessions)() as read_session:
+        yield read_session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+
+
 class Base(DeclarativeBase):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
@@ -1,10 +1,12 @@
+import hmac
+
 from typing import Annotated
 
 from authx import TokenPayload
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Request, status
 
 from .services import UserModel, UserServiceDep
-from .settings import security
+from .settings import security, settings
 
 AccessTokenDep = Annotated[TokenPayload, Depends(security.access_token_required)]
 RefreshTokenDep = Annotated[TokenPayload, Depends(security.refresh_token_required)]
@@ -22,3 +24,20 @@ async def get_user(
 
 
 UserModelDep = Annotated[UserModel, Depends(get_user)]
+
+
+async def require_metrics_token(request: Request) -> None:
+    # метрики раскрывают внутреннее состояние сервиса, поэтому отдаются
+    # только по общему с системой мониторинга токену; без токена их нет
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(),
+        settings.METRICS_TOKEN.encode(),
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+
+MetricsAccessDep = Depends(require_metrics_token)
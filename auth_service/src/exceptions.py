@@ -2,6 +2,8 @@ from authx.exceptions import JWTDecodeError, MissingTokenError
 from fastapi import Request
 from fastapi.responses import JSONResponse
 
+from .hasher import PasswordHasherBusyError
+
 
 async def jwt_decode_error_handler(request: Request, exc: Exception):
     if isinstance(exc, JWTDecodeError):
@@ -27,3 +29,17 @@ async def missing_token_error_handler(request: Request, exc: Exception):
         status_code=500,
         content={"detail": "Internal server error"},
     )
+
+
+async def password_hasher_busy_error_handler(request: Request, exc: Exception):
+    if isinstance(exc, PasswordHasherBusyError):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Сервис перегружен, повторите попытку позже."},
+            headers={"Retry-After": "1"},
+        )
+
+    return JSONResponse(
+        status_code=500,
+        content={"detail": "Internal server error"},
+    )
@@ -0,0 +1,81 @@
+import uuid
+
+from redis.asyncio import Redis
+
+from .redis import redis_client
+from .settings import settings
+
+# Отдельный ключ на семейство refresh-токенов (сессию): значение - поколение.
+# У каждого ключа свой TTL, поэтому заброшенные сессии удаляет сам Redis.
+# Предъявлен токен старого поколения - значит, его украли и уже использовали,
+# поэтому семейство отзывается целиком.
+# KEYS[1] - refresh:{uid}:{family}
+# ARGV[1] - generation, ARGV[2] - lifetime
+ROTATE_FAMILY_SCRIPT = """
+local current = redis.call("GET", KEYS[1])
+if not current then
+    return -1
+end
+if current ~= ARGV[1] then
+    redis.call("DEL", KEYS[1])
+    return -2
+end
+local generation = redis.call("INCR", KEYS[1])
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+return generation
+"""
+
+rotate_family_script = redis_client.register_script(ROTATE_FAMILY_SCRIPT)
+
+
+async def load_family_scripts() -> None:
+    await redis_client.script_load(rotate_family_script.script)
+
+
+class SessionRevokedError(Exception):
+    pass
+
+
+class RefreshTokenFamilies:
+    def __init__(
+        self,
+        cache: Redis,
+        lifetime: int,
+    ) -> None:
+        self.cache = cache
+        self.lifetime = lifetime
+
+    def _key(self, uid: str, family: str) -> str:
+        return f"refresh:{uid}:{family}"
+
+    async def start(self, uid: str) -> tuple[str, int]:
+        family = uuid.uuid4().hex
+        await self.cache.set(self._key(uid, family), 0, ex=self.lifetime)
+
+        return family, 0
+
+    async def rotate(
+        self,
+        uid: str,
+        family: str,
+        generation: int,
+    ) -> int:
+        result = await rotate_family_script(
+            keys=[self._key(uid, family)],
+            args=[generation, self.lifetime],
+            client=self.cache,
+        )
+
+        if result < 0:
+            raise SessionRevokedError
+
+        return result
+
+    async def revoke(self, uid: str, family: str) -> None:
+        await self.cache.delete(self._key(uid, family))
+
+
+refresh_families = RefreshTokenFamilies(
+    cache=redis_client,
+    lifetime=int(settings.JWT_REFRESH_TOKEN_EXPIRES.total_seconds()),
+)
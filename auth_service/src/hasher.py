@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+from .settings import settings
+from .utils import hash_password, hash_rounds, verify_password
+
+
+class PasswordHasherBusyError(Exception):
+    pass
+
+
+@dataclass
+class HasherStats:
+    completed: int = 0
+    rejected: int = 0
+    pending: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    hash_time_total: float = 0.0
+    hash_time_max: float = 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["queue_wait_avg"] = (
+            self.queue_wait_total / self.completed if self.completed else 0.0
+        )
+        data["hash_time_avg"] = (
+            self.hash_time_total / self.completed if self.completed else 0.0
+        )
+        return data
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        executor_type: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 64,
+        rounds: int = 12,
+    ) -> None:
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Неизвестный тип пула: '{executor_type}'")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.stats = HasherStats()
+
+        self._executor: Executor | None = None
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+
+        if self.executor_type == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hasher",
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is None:
+            return
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return hash_rounds(hashed_password) != self.rounds
+
+    async def _run(self, func, *args):
+        if self.stats.pending >= self.max_workers + self.max_queue:
+            self.stats.rejected += 1
+            raise PasswordHasherBusyError
+
+        self.start()
+        self.stats.pending += 1
+        queued_at = time.perf_counter()
+
+        try:
+            async with self._semaphore:
+                started_at = time.perf_counter()
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, func, *args)
+                finished_at = time.perf_counter()
+        finally:
+            self.stats.pending -= 1
+
+        self._observe(started_at - queued_at, finished_at - started_at)
+
+        return result
+
+    def _observe(self, queue_wait: float, hash_time: float) -> None:
+        self.stats.completed += 1
+        self.stats.queue_wait_total += queue_wait
+        self.stats.queue_wait_max = max(self.stats.queue_wait_max, queue_wait)
+        self.stats.hash_time_total += hash_time
+        self.stats.hash_time_max = max(self.stats.hash_time_max, hash_time)
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASHER_EXECUTOR,
+    max_workers=settings.PASSWORD_HASHER_WORKERS,
+    max_queue=settings.PASSWORD_HASHER_MAX_QUEUE,
+    rounds=settings.BCRYPT_ROUNDS,
+)
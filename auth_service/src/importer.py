@@ -0,0 +1,185 @@
+import asyncio
+import csv
+import sys
+import time
+
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import IO, Any, Iterator
+
+from pydantic import ValidationError
+
+from .db import Session
+from .schemas import ImportUserSchema
+from .services import UserService
+from .utils import hash_password
+
+FORMATS = ("csv", "jsonl")
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    batches: int = 0
+    hash_time: float = 0.0
+    insert_time: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def read_records(file: IO[str], file_format: str) -> Iterator[tuple[int, Any]]:
+    if file_format == "csv":
+        # строка 1 — заголовок
+        for line_number, record in enumerate(csv.DictReader(file), start=2):
+            yield line_number, {key: value for key, value in record.items() if value}
+    elif file_format == "jsonl":
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                yield line_number, line
+    else:
+        raise ValueError(f"Неизвестный формат: '{file_format}'")
+
+
+def hash_passwords(passwords: list[str], rounds: int) -> list[str]:
+    return [hash_password(password, rounds) for password in passwords]
+
+
+class UserImporter:
+    def __init__(
+        self,
+        executor: Executor,
+        workers: int,
+        rounds: int = 12,
+        batch_size: int = 1000,
+        queue_size: int = 2,
+        progress: IO[str] = sys.stderr,
+    ) -> None:
+        self.executor = executor
+        self.workers = workers
+        self.rounds = rounds
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.progress = progress
+        self.stats = ImportStats()
+
+        self._started_at = 0.0
+
+    def _parse(self, line_number: int, record: Any) -> dict[str, Any] | None:
+        try:
+            if isinstance(record, str):
+                user = ImportUserSchema.model_validate_json(record)
+            else:
+                user = ImportUserSchema.model_validate(record)
+        except ValidationError as e:
+            self.stats.invalid += 1
+            errors = "; ".join(error["msg"] for error in e.errors())
+            print(f"строка {line_number}: {errors}", file=self.progress)
+            return None
+
+        return {
+            "email": user.email,
+            "username": user.username,
+            "password": user.password_hash or user.password,
+            "email_verified": user.email_verified,
+            "hash": user.password_hash is None and user.password is not None,
+        }
+
+    async def _hash(self, rows: list[dict[str, Any]]) -> None:
+        pending = [row for row in rows if row.pop("hash")]
+        if not pending:
+            return
+
+        started_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        # пачка делится между процессами крупными кусками, чтобы не гонять
+        # по одному паролю через pickle
+        chunk_size = -(-len(pending) // self.workers)
+        chunks = [
+            pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)
+        ]
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self.executor,
+                    hash_passwords,
+                    [row["password"] for row in chunk],
+                    self.rounds,
+                )
+                for chunk in chunks
+            )
+        )
+
+        for chunk, hashes in zip(chunks, results):
+            for row, hashed_password in zip(chunk, hashes):
+                row["password"] = hashed_password
+
+        self.stats.hash_time += time.perf_counter() - started_at
+
+    async def _produce(
+        self,
+        records: Iterator[tuple[int, Any]],
+        queue: asyncio.Queue,
+    ) -> None:
+        try:
+            while batch := list(islice(records, self.batch_size)):
+                self.stats.read += len(batch)
+                rows = [
+                    row
+                    for row in (self._parse(*record) for record in batch)
+                    if row is not None
+                ]
+                await self._hash(rows)
+                await queue.put(rows)
+        finally:
+            await queue.put(None)
+
+    async def _consume(self, queue: asyncio.Queue) -> None:
+        async with Session() as session:
+            user_service = UserService(session)
+
+            while (rows := await queue.get()) is not None:
+                started_at = time.perf_counter()
+                inserted = await user_service.bulk_create(rows)
+
+                self.stats.insert_time += time.perf_counter() - started_at
+                self.stats.inserted += inserted
+                self.stats.duplicates += len(rows) - inserted
+                self.stats.batches += 1
+                self._report()
+
+    def _report(self) -> None:
+        elapsed = time.perf_counter() - self._started_at
+        rate = self.stats.read / elapsed if elapsed else 0.0
+        print(
+            f"прочитано {self.stats.read}, добавлено {self.stats.inserted}, "
+            f"дубликатов {self.stats.duplicates}, с ошибками {self.stats.invalid} "
+            f"({rate:.0f} строк/с)",
+            file=self.progress,
+        )
+
+    async def run(self, file: IO[str], file_format: str) -> ImportStats:
+        self._started_at = time.perf_counter()
+
+        # очередь ограничена: хеширование следующей пачки идёт параллельно
+        # с вставкой текущей, а в памяти не больше queue_size + 2 пачек
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        producer = asyncio.create_task(
+            self._produce(read_records(file, file_format), queue)
+        )
+
+        try:
+            await self._consume(queue)
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+        return self.stats
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import logging
+
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from jwt.algorithms import get_default_algorithms
+from watchfiles import awatch
+
+logger = logging.getLogger(__name__)
+
+
+def key_thumbprint(public_key) -> str:
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return hashlib.sha256(der).hexdigest()[:16]
+
+
+class KeyRing:
+    def __init__(
+        self,
+        algorithm: str,
+        keys_dir: str = "",
+        signing_kid: str = "",
+        private_key_path: str = "",
+        public_key_path: str = "",
+    ) -> None:
+        self.algorithm = algorithm
+        self.keys_dir = Path(keys_dir) if keys_dir else None
+        self.pinned_kid = signing_kid
+        self.private_key_path = private_key_path
+        self.public_key_path = public_key_path
+        self.version = 0
+
+        self.signing_kid = ""
+        self.signing_key = None
+        self._public_keys: dict = {}
+        self._task: asyncio.Task | None = None
+
+    def load(self) -> None:
+        if self.keys_dir is not None:
+            signing_kid, signing_key, public_keys = self._load_dir()
+        else:
+            signing_kid, signing_key, public_keys = self._load_files()
+
+        self.signing_kid = signing_kid
+        self.signing_key = signing_key
+        self._public_keys = public_keys
+        self.version += 1
+
+    def _load_dir(self):
+        paths = sorted(
+            self.keys_dir.glob("*.pem"),
+            key=lambda path: path.stat().st_mtime,
+        )
+        if not paths:
+            raise RuntimeError(f"В каталоге {self.keys_dir} нет ключей")
+
+        private_keys = {
+            path.stem: serialization.load_pem_private_key(
+                path.read_bytes(),
+                password=None,
+            )
+            for path in paths
+        }
+        signing_kid = self.pinned_kid or paths[-1].stem
+
+        if signing_kid not in private_keys:
+            raise RuntimeError(f"Ключ '{signing_kid}' не найден в {self.keys_dir}")
+
+        public_keys = {kid: key.public_key() for kid, key in private_keys.items()}
+
+        return signing_kid, private_keys[signing_kid], public_keys
+
+    def _load_files(self):
+        with open(self.private_key_path, "rb") as f:
+            private_key = serialization.load_pem_private_key(f.read(), password=None)
+        with open(self.public_key_path, "rb") as f:
+            public_key = serialization.load_pem_public_key(f.read())
+
+        kid = key_thumbprint(public_key)
+
+        return kid, private_key, {kid: public_key}
+
+    def public_key(self, kid: str | None):
+        return self._public_keys.get(kid or self.signing_kid)
+
+    def private_pem(self) -> str:
+        return self.signing_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        ).decode()
+
+    def public_pem(self) -> str:
+        return (
+            self.signing_key.public_key()
+            .public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+            .decode()
+        )
+
+    def jwks(self) -> dict:
+        algorithm = get_default_algorithms()[self.algorithm]
+
+        return {
+            "keys": [
+                algorithm.to_jwk(key, as_dict=True)
+                | {"kid": kid, "use": "sig", "alg": self.algorithm}
+                for kid, key in self._public_keys.items()
+            ]
+        }
+
+    async def start(self) -> None:
+        if self.keys_dir is not None and self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    async def _watch(self) -> None:
+        async for _ in awatch(self.keys_dir):
+            try:
+                self.load()
+            except Exception:
+                logger.exception("Не удалось перечитать ключи, оставлены прежние")
@@ -1,4 +1,14 @@
-from sqlalchemy import Boolean, String, UniqueConstraint
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Index,
+    String,
+    UniqueConstraint,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .db import Base
@@ -9,6 +19,13 @@ class UserModel(Base):
     __table_args__ = (
         UniqueConstraint("username", name="uq_username"),
         UniqueConstraint("email", name="uq_email"),
+        # частичный индекс только по неподтверждённым — под очистку
+        Index(
+            "ix_users_unverified_created_at",
+            "created_at",
+            postgresql_where=text("NOT email_verified"),
+            sqlite_where=text("NOT email_verified"),
+        ),
     )
 
     username: Mapped[str] = mapped_column(String(50), nullable=True)
@@ -16,3 +33,8 @@ class UserModel(Base):
     password: Mapped[str] = mapped_column(String(255), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     email_verified: Mapped[bool] = mapped_column(Boolean, default=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+from dataclasses import asdict, dataclass
+
+from faststream.rabbit import RabbitBroker
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+OUTBOX_STREAM = "outbox"
+OUTBOX_GROUP = "publisher"
+OUTBOX_DEAD_STREAM = "outbox:dead"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxStats:
+    batches: int = 0
+    published: int = 0
+    failed: int = 0
+    reclaimed: int = 0
+    dead_lettered: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        cache: Redis,
+        broker: RabbitBroker,
+        batch_size: int,
+        block_ms: int,
+        claim_idle_ms: int,
+        max_attempts: int = 5,
+    ) -> None:
+        self.cache = cache
+        self.broker = broker
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_attempts = max_attempts
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.stats = OutboxStats()
+
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        try:
+            await self.cache.xgroup_create(
+                OUTBOX_STREAM,
+                OUTBOX_GROUP,
+                id="0",
+                mkstream=True,
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    async def _run(self) -> None:
+        claimed_at = 0.0
+
+        while True:
+            try:
+                if time.monotonic() - claimed_at > self.claim_idle_ms / 1000:
+                    await self._reclaim()
+                    claimed_at = time.monotonic()
+
+                response = await self.cache.xreadgroup(
+                    OUTBOX_GROUP,
+                    self.consumer,
+                    {OUTBOX_STREAM: ">"},
+                    count=self.batch_size,
+                    block=self.block_ms,
+                )
+
+                for _, entries in response:
+                    await self._publish(entries)
+            except RedisError as e:
+                logger.warning(f"Outbox недоступен: {e!r}")
+                await asyncio.sleep(1)
+            except Exception:
+                logger.exception("Сбой публикации outbox, повтор через 1 с")
+                await asyncio.sleep(1)
+
+    async def _reclaim(self) -> None:
+        start_id = "0-0"
+
+        while True:
+            start_id, entries, *_ = await self.cache.xautoclaim(
+                OUTBOX_STREAM,
+                OUTBOX_GROUP,
+                self.consumer,
+                min_idle_time=self.claim_idle_ms,
+                start_id=start_id,
+                count=self.batch_size,
+            )
+            entries = [entry for entry in entries if entry[1]]
+
+            if entries:
+                self.stats.reclaimed += len(entries)
+                entries = await self._drop_poisoned(entries)
+                await self._publish(entries)
+
+            if start_id in (b"0-0", "0-0"):
+                return
+
+    async def _drop_poisoned(self, entries):
+        # каждое перехватывание увеличивает счётчик доставок записи; письмо,
+        # которое так и не удалось опубликовать, уходит в отдельный стрим,
+        # а не крутится в outbox бесконечно
+        pending = await self.cache.xpending_range(
+            OUTBOX_STREAM,
+            OUTBOX_GROUP,
+            min=entries[0][0],
+            max=entries[-1][0],
+            count=len(entries),
+            consumername=self.consumer,
+        )
+        attempts = {item["message_id"]: item["times_delivered"] for item in pending}
+
+        poisoned = [
+            (entry_id, fields)
+            for entry_id, fields in entries
+            if attempts.get(entry_id, 0) > self.max_attempts
+        ]
+        if not poisoned:
+            return entries
+
+        async with self.cache.pipeline(transaction=True) as pipe:
+            for entry_id, fields in poisoned:
+                pipe.xadd(OUTBOX_DEAD_STREAM, {**fields, b"id": entry_id})
+            ids = [entry_id for entry_id, _ in poisoned]
+            pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, *ids)
+            pipe.xdel(OUTBOX_STREAM, *ids)
+            await pipe.execute()
+
+        for entry_id, _ in poisoned:
+            logger.error(
+                f"Запись outbox {entry_id!r} не опубликована за "
+                f"{self.max_attempts} попыток, перенесена в {OUTBOX_DEAD_STREAM}"
+            )
+
+        self.stats.dead_lettered += len(poisoned)
+        dead = set(ids)
+
+        return [entry for entry in entries if entry[0] not in dead]
+
+    async def _publish_one(self, fields) -> None:
+        await self.broker.publish(
+            json.loads(fields[b"payload"]),
+            queue=fields[b"queue"].decode(),
+        )
+
+    async def _publish(self, entries) -> None:
+        if not entries:
+            return
+
+        results = await asyncio.gather(
+            *(self._publish_one(fields) for _, fields in entries),
+            return_exceptions=True,
+        )
+
+        delivered = []
+        for (entry_id, _), result in zip(entries, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"Запись outbox {entry_id!r} не опубликована: {result!r}"
+                )
+            else:
+                delivered.append(entry_id)
+
+        self.stats.batches += 1
+        self.stats.published += len(delivered)
+        self.stats.failed += len(entries) - len(delivered)
+
+        if delivered:
+            async with self.cache.pipeline(transaction=False) as pipe:
+                pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, *delivered)
+                pipe.xdel(OUTBOX_STREAM, *delivered)
+                await pipe.execute()
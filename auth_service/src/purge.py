@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .db import Session
+from .redis import redis_client
+from .services import UserService
+from .settings import settings
+
+PURGE_LOCK_KEY = "purge:unverified"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PurgeStats:
+    runs: int = 0
+    skipped_runs: int = 0
+    failed_runs: int = 0
+    batches: int = 0
+    purged: int = 0
+    last_purged: int = 0
+    last_duration: float = 0.0
+    last_run_at: float | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class UnverifiedUserPurger:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        cache: Redis,
+        max_age: timedelta,
+        interval: int,
+        batch_size: int,
+        batch_pause: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.cache = cache
+        self.max_age = max_age
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.stats = PurgeStats()
+
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    async def purge(self) -> int:
+        created_before = datetime.now(timezone.utc) - self.max_age
+        started_at = time.perf_counter()
+        purged = 0
+
+        async with self.session_factory() as session:
+            user_service = UserService(session)
+
+            while True:
+                deleted_ids = await user_service.delete_unverified(
+                    created_before=created_before,
+                    limit=self.batch_size,
+                )
+                purged += len(deleted_ids)
+                self.stats.purged += len(deleted_ids)
+                self.stats.batches += 1
+
+                if len(deleted_ids) < self.batch_size:
+                    break
+
+                # пауза между пачками даёт пройти остальным запросам
+                await asyncio.sleep(self.batch_pause)
+
+        self.stats.runs += 1
+        self.stats.last_purged = purged
+        self.stats.last_duration = time.perf_counter() - started_at
+        self.stats.last_run_at = time.time()
+
+        return purged
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                # при нескольких воркерах очистку за интервал выполняет один
+                if await self.cache.set(
+                    PURGE_LOCK_KEY,
+                    1,
+                    nx=True,
+                    ex=max(1, self.interval - 1),
+                ):
+                    await self.purge()
+                else:
+                    self.stats.skipped_runs += 1
+            except Exception:
+                self.stats.failed_runs += 1
+                logger.exception("Очистка неподтверждённых пользователей не удалась")
+
+            await asyncio.sleep(self.interval)
+
+
+unverified_purger = UnverifiedUserPurger(
+    session_factory=Session,
+    cache=redis_client,
+    max_age=settings.PURGE_UNVERIFIED_AFTER,
+    interval=settings.PURGE_INTERVAL,
+    batch_size=settings.PURGE_BATCH_SIZE,
+    batch_pause=settings.PURGE_BATCH_PAUSE,
+)
@@ -0,0 +1,158 @@
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from .redis import RedisDep, redis_client
+from .settings import settings
+
+# Скользящее окно: оценка = prev * (доля окна, ещё не прошедшая) + current.
+# Сначала проверяются все ключи, и только если все укладываются в лимит,
+# счётчики увеличиваются.
+# KEYS[i] - базовый ключ, ARGV[2i-1] - лимит, ARGV[2i] - окно в секундах
+SLIDING_WINDOW_SCRIPT = """
+local now = redis.call("TIME")
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local retry_after = 0
+local counters = {}
+
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local window = tonumber(ARGV[i * 2]) * 1000
+    local index = math.floor(now_ms / window)
+    local elapsed = now_ms - index * window
+    local current = tonumber(redis.call("GET", key .. ":" .. index) or "0")
+    local previous = tonumber(redis.call("GET", key .. ":" .. (index - 1)) or "0")
+
+    if previous * (window - elapsed) / window + current >= limit then
+        retry_after = math.max(retry_after, window - elapsed)
+    end
+
+    counters[i] = {key .. ":" .. index, tonumber(ARGV[i * 2]) * 2}
+end
+
+if retry_after > 0 then
+    return math.ceil(retry_after / 1000)
+end
+
+for _, counter in ipairs(counters) do
+    redis.call("INCR", counter[1])
+    redis.call("EXPIRE", counter[1], counter[2])
+end
+
+return 0
+"""
+
+sliding_window_script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+
+async def load_rate_limit_scripts() -> None:
+    await redis_client.script_load(sliding_window_script.script)
+
+
+def parse_rate(rate: str) -> tuple[int, int] | None:
+    if not rate:
+        return None
+
+    limit, window = rate.split("/")
+
+    return int(limit), int(window)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        scope: str,
+        per_ip: str = "",
+        per_identity: str = "",
+        total: str = "",
+        identity_field: str | None = None,
+    ) -> None:
+        self.scope = scope
+        self.per_ip = parse_rate(per_ip)
+        self.per_identity = parse_rate(per_identity)
+        self.total = parse_rate(total)
+        self.identity_field = identity_field
+
+    async def __call__(
+        self,
+        request: Request,
+        cache: RedisDep,
+    ) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        keys: list[str] = []
+        args: list[int] = []
+        prefix = f"ratelimit:{self.scope}"
+
+        if self.per_ip and request.client:
+            keys.append(f"{prefix}:ip:{request.client.host}")
+            args.extend(self.per_ip)
+
+        identity = await self._get_identity(request)
+        if self.per_identity and identity:
+            keys.append(f"{prefix}:id:{identity}")
+            args.extend(self.per_identity)
+
+        if self.total:
+            keys.append(f"{prefix}:total")
+            args.extend(self.total)
+
+        if not keys:
+            return
+
+        try:
+            retry_after = await sliding_window_script(
+                keys=keys,
+                args=args,
+                client=cache,
+            )
+        except RedisError:
+            return
+
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много запросов, попробуйте позже.",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    async def _get_identity(self, request: Request) -> str | None:
+        if self.identity_field is None:
+            return None
+
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+
+        if not isinstance(body, dict):
+            return None
+
+        identity = body.get(self.identity_field)
+
+        return str(identity).strip().lower() if identity else None
+
+
+login_rate_limit = RateLimiter(
+    scope="login",
+    per_ip=settings.RATE_LIMIT_LOGIN_PER_IP,
+    per_identity=settings.RATE_LIMIT_LOGIN_PER_USERNAME,
+    total=settings.RATE_LIMIT_LOGIN_TOTAL,
+    identity_field="username",
+)
+
+pre_register_rate_limit = RateLimiter(
+    scope="pre_register",
+    per_ip=settings.RATE_LIMIT_EMAIL_PER_IP,
+    per_identity=settings.RATE_LIMIT_EMAIL_PER_ADDRESS,
+    total=settings.RATE_LIMIT_EMAIL_TOTAL,
+    identity_field="email",
+)
+
+forgot_password_rate_limit = RateLimiter(
+    scope="forgot_password",
+    per_ip=settings.RATE_LIMIT_EMAIL_PER_IP,
+    per_identity=settings.RATE_LIMIT_EMAIL_PER_ADDRESS,
+    total=settings.RATE_LIMIT_EMAIL_TOTAL,
+    identity_field="email",
+)
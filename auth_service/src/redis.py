@@ -1,11 +1,33 @@
 from typing import Annotated
 
 from fastapi import Depends
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from .settings import settings
+
+redis_pool = BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+)
+
+redis_client = Redis(connection_pool=redis_pool)
+
+
+async def init_redis() -> None:
+    await redis_client.ping()
+
+
+async def close_redis() -> None:
+    await redis_client.aclose()
+    await redis_pool.disconnect()
 
 
 async def get_redis() -> Redis:
-    return Redis.from_url("redis://redis:6379/0")
+    return redis_client
 
 
 RedisDep = Annotated[Redis, Depends(get_redis)]
@@ -1,16 +1,24 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from faststream.rabbit.fastapi import RabbitRouter
-from sqlalchemy.exc import IntegrityError
 
+from .blacklist import token_blacklist
 from .dependencies import (
     AccessTokenRequiredDep,
     RefreshTokenDep,
     RefreshTokenRequiredDep,
     UserModelDep,
 )
-from .redis import RedisDep
+from .families import SessionRevokedError, refresh_families
+from .hasher import PasswordHasherBusyError, password_hasher
+from .outbox import OutboxRelay
+from .rate_limit import (
+    forgot_password_rate_limit,
+    login_rate_limit,
+    pre_register_rate_limit,
+)
+from .redis import redis_client
 from .schemas import (
     ChangePasswordSchema,
     EmailSchema,
@@ -20,19 +28,46 @@ from .schemas import (
 )
 from .services import UserServiceDep
 from .settings import security, settings
-from .utils import generate_token, hash_password, verify_password
+from .tokens import (
+    ResetTokenStoreDep,
+    TokenCooldownError,
+    TokenNotFoundError,
+    VerifyTokenStoreDep,
+)
 
 router = APIRouter()
 rb_router = RabbitRouter(settings.FASTSTREAM_RABBITMQ_URL)
 
+outbox_relay = OutboxRelay(
+    cache=redis_client,
+    broker=rb_router.broker,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    block_ms=settings.OUTBOX_BLOCK_MS,
+    claim_idle_ms=settings.OUTBOX_CLAIM_IDLE_MS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+)
+
+
+@rb_router.after_startup
+async def start_outbox_relay(app):
+    await outbox_relay.start()
+
+
+@rb_router.on_broker_shutdown
+async def stop_outbox_relay(app):
+    await outbox_relay.stop()
 
-@rb_router.post("/pre_register")
+
+@rb_router.post(
+    "/pre_register",
+    dependencies=[Depends(pre_register_rate_limit)],
+)
 async def pre_register(
     payload: EmailSchema,
     user_service: UserServiceDep,
-    cache: RedisDep,
+    tokens: VerifyTokenStoreDep,
 ):
-    user = await user_service.get(email=payload.email)
+    user = await user_service.get_or_create(email=payload.email)
 
     if user and user.email_verified:
         raise HTTPException(
@@ -40,56 +75,42 @@ async def pre_register(
             detail="Эта почта уже подтверждена.",
         )
 
-    key = f"verify:token:{payload.email}"
-    token_exists = await cache.exists(key)
+    token = await tokens.issue(
+        email=payload.email,
+        queue="send_verify_token",
+        password_hash=user.password if user else None,
+    )
 
-    if token_exists > 0:
+    if not token:
         raise HTTPException(
             status_code=429,
             detail="Токен уже отправлен ранее.",
         )
-    try:
-        await user_service.create(email=payload.email)
-    except IntegrityError:
-        pass
-
-    token = generate_token()
-
-    await cache.set(
-        name=f"verify:email:{token}",
-        ex=settings.VERIFY_TOKEN_LIFETIME,
-        value=payload.email,
-    )
-    await cache.set(
-        name=f"verify:token:{payload.email}",
-        ex=settings.VERIFY_TOKEN_LIFETIME,
-        value=token,
-    )
-
-    await rb_router.broker.publish(
-        {
-            "email": payload.email,
-            "link": settings.BASE_URL + f"verify?token={token}",
-        },
-        queue="send_verify_token",
-    )
 
     return {"status": "OK"}
 
 
-@router.post("/login")
+@router.post(
+    "/login",
+    dependencies=[Depends(login_rate_limit)],
+)
 async def login(
     credentials: UserLoginSchema,
     response: Response,
     user_service: UserServiceDep,
 ):
-    user = await user_service.get(
+    user = await user_service.get_with_password(
         username=credentials.username,
     )
 
-    if not user or not verify_password(
-        password=credentials.password,
-        hashed_password=user.password,
+    # у предрегистрированных и импортированных без пароля хеша нет
+    if (
+        not user
+        or user.password is None
+        or not await password_hasher.verify(
+            password=credentials.password,
+            hashed_password=user.password,
+        )
     ):
         raise HTTPException(
             status_code=401,
@@ -102,13 +123,31 @@ async def login(
             detail="Аккаунт заблокирован",
         )
 
+    # хеш со старой стоимостью пересчитываем, пока известен пароль
+    if password_hasher.needs_rehash(user.password):
+        try:
+            hashed_password = await password_hasher.hash(credentials.password)
+        except PasswordHasherBusyError:
+            pass
+        else:
+            await user_service.update(
+                id=user.id,
+                new_data={"password": hashed_password},
+            )
+
+    family, generation = await refresh_families.start(str(user.id))
+
+    # семейство в access токене позволяет другим сервисам отозвать его
+    # вместе с сессией, не заводя запись на каждый токен
     access_token = security.create_access_token(
         uid=str(user.id),
         expiry=timedelta(minutes=30),
+        data={"fam": family},
     )
     refresh_token = security.create_refresh_token(
         uid=str(user.id),
         expiry=timedelta(days=7),
+        data={"fam": family, "gen": generation},
     )
 
     response.set_cookie(
@@ -133,56 +172,39 @@ async def login(
 @rb_router.post("/resend_verification")
 async def resend_verification(
     payload: EmailSchema,
-    cache: RedisDep,
+    tokens: VerifyTokenStoreDep,
     user_service: UserServiceDep,
 ):
-    user = await user_service.get(email=payload.email)
+    user = await user_service.get_with_password(email=payload.email)
     if user and user.email_verified:
         raise HTTPException(
             status_code=status.HTTP_406_NOT_ACCEPTABLE,
             detail="Эта почта уже подтверждена.",
         )
 
-    key = f"verify:token:{payload.email}"
-    existing_ttl = await cache.ttl(key)
-
-    if existing_ttl > 0:
-        time_passed = settings.VERIFY_TOKEN_LIFETIME - existing_ttl
-        remains = settings.MIN_RESEND_TOKEN_LIFETIME - time_passed
-
-        if remains > 0:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Токен уже отправлен. Повторно можно через {remains} секунд.",
-            )
-    else:
+    if not user:
         raise HTTPException(
             status_code=404,
             detail="Токен не найден или истёк. Пройдите регистрацию заново.",
         )
-    token = await cache.get(key)
-    await cache.delete(f"verify:token:{payload.email}", f"verify:email:{token}")
-
-    token = generate_token()
-
-    await cache.set(
-        name=f"verify:email:{token}",
-        ex=settings.VERIFY_TOKEN_LIFETIME,
-        value=payload.email,
-    )
-    await cache.set(
-        name=f"verify:token:{payload.email}",
-        ex=settings.VERIFY_TOKEN_LIFETIME,
-        value=token,
-    )
 
-    await rb_router.broker.publish(
-        {
-            "email": payload.email,
-            "link": settings.BASE_URL + f"verify?token={token}",
-        },
-        queue="resend_verify_token",
-    )
+    try:
+        await tokens.rotate(
+            email=payload.email,
+            min_resend_interval=settings.MIN_RESEND_TOKEN_LIFETIME,
+            queue="resend_verify_token",
+            password_hash=user.password,
+        )
+    except TokenCooldownError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Токен уже отправлен. Повторно можно через {e.remains} секунд.",
+        )
+    except TokenNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Токен не найден или истёк. Пройдите регистрацию заново.",
+        )
 
     return {"status": "OK"}
 
@@ -191,18 +213,21 @@ async def resend_verification(
 async def verify_email(
     token: str,
     credentials: SetCredentialsSchema,
-    cache: RedisDep,
+    tokens: VerifyTokenStoreDep,
     user_service: UserServiceDep,
 ):
-    email = await cache.get(f"verify:email:{token}")
+    # до хеширования токен только проверяется, чтобы ошибка на поиске
+    # пользователя или перегруженный хешер не лишали ссылки
+    claims = await tokens.peek(token)
 
-    if not email:
+    if not claims:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Токен истек либо не запрашивался",
         )
 
-    user = await user_service.get(email=email.decode())
+    user_service.pin_primary()
+    user = await user_service.get(email=claims.email)
 
     if not user:
         raise HTTPException(
@@ -210,6 +235,12 @@ async def verify_email(
             detail="Пользователь не найден",
         )
 
+    if not tokens.is_current(claims, user.password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Токен истек либо не запрашивался",
+        )
+
     if user and user.email_verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -218,11 +249,28 @@ async def verify_email(
 
     data = credentials.model_dump()
     data["email_verified"] = True
-    data["password"] = hash_password(data["password"])
+    data["password"] = await password_hasher.hash(data["password"])
 
-    await user_service.update(email=user.email, new_data=data)
+    # из одновременных запросов с одной ссылкой дальше проходит один, а
+    # условие в UPDATE защищает и подписанные токены, которые не хранятся
+    if not await tokens.consume(token):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Токен истек либо не запрашивался",
+        )
+
+    updated = await user_service.update(
+        email=user.email,
+        email_verified=False,
+        new_data=data,
+        returning=True,
+    )
 
-    await cache.delete(f"verify:email:{token}", f"verify:token:{email}")
+    if not updated:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email уже подтверждён.",
+        )
 
 
 @router.get("/me")
@@ -236,33 +284,33 @@ async def change_password(
     user_service: UserServiceDep,
     payload: ChangePasswordSchema,
 ):
-    if not verify_password(payload.old_password, user.password):
+    user = await user_service.get_with_password(id=user.id)
+
+    if user.password is None or not await password_hasher.verify(
+        payload.old_password,
+        user.password,
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Некорректный пароль, попробуйте ещё раз или сбросьте пароль",
         )
 
-    hashed_password = hash_password(payload.new_password)
+    hashed_password = await password_hasher.hash(payload.new_password)
     await user_service.update(id=user.id, new_data={"password": hashed_password})
 
     return {"status": "OK"}
 
 
-@rb_router.post("/forgot_password")
+@rb_router.post(
+    "/forgot_password",
+    dependencies=[Depends(forgot_password_rate_limit)],
+)
 async def forgot_password(
     payload: EmailSchema,
-    cache: RedisDep,
+    tokens: ResetTokenStoreDep,
     user_service: UserServiceDep,
 ):
-    token_exists = await cache.exists(f"reset:token:{payload.email}")
-
-    if token_exists:
-        raise HTTPException(
-            status_code=429,
-            detail="Токен уже отправлен ранее.",
-        )
-
-    user = await user_service.get(email=payload.email)
+    user = await user_service.get_with_password(email=payload.email)
 
     if not user:
         raise HTTPException(
@@ -276,27 +324,18 @@ async def forgot_password(
             detail="Почта не подтверждена.",
         )
 
-    token = generate_token()
-
-    await cache.set(
-        name=f"reset:token:{user.email}",
-        ex=settings.RESET_TOKEN_LIFETIME,
-        value=token,
-    )
-    await cache.set(
-        name=f"reset:email:{token}",
-        ex=settings.RESET_TOKEN_LIFETIME,
-        value=user.email,
-    )
-
-    await rb_router.broker.publish(
-        message={
-            "email": user.email,
-            "link": settings.BASE_URL + f"reset?token={token}",
-        },
+    token = await tokens.issue(
+        email=user.email,
         queue="send_reset_password_token",
+        password_hash=user.password,
     )
 
+    if not token:
+        raise HTTPException(
+            status_code=429,
+            detail="Токен уже отправлен ранее.",
+        )
+
     return {"status": "OK"}
 
 
@@ -304,18 +343,19 @@ async def forgot_password(
 async def resend_password(
     token: str,
     payload: ResetPasswordSchema,
-    cache: RedisDep,
+    tokens: ResetTokenStoreDep,
     user_service: UserServiceDep,
 ):
-    email = await cache.get(f"reset:email:{token}")
+    claims = await tokens.peek(token)
 
-    if not email:
+    if not claims:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Токен истек либо не запрашивался",
         )
 
-    user = await user_service.get(email=email.decode())
+    user_service.pin_primary()
+    user = await user_service.get(email=claims.email)
 
     if not user:
         raise HTTPException(
@@ -323,16 +363,39 @@ async def resend_password(
             detail="Неправильные данные",
         )
 
+    if not tokens.is_current(claims, user.password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Токен истек либо не запрашивался",
+        )
+
     if not user.email_verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Почта не подтверждена.",
         )
 
-    data = {"password": hash_password(payload.new_password)}
-    await user_service.update(email=user.email, new_data=data)
+    data = {"password": await password_hasher.hash(payload.new_password)}
 
-    await cache.delete(f"reset:email:{token}", f"reset:token:{email}")
+    if not await tokens.consume(token):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Токен истек либо не запрашивался",
+        )
+
+    # пароль меняется, только если его не сменили с момента проверки токена
+    updated = await user_service.update(
+        email=user.email,
+        password=user.password,
+        new_data=data,
+        returning=True,
+    )
+
+    if not updated:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Токен истек либо не запрашивался",
+        )
 
     return {"status": "OK"}
 
@@ -346,16 +409,15 @@ async def resend_password(
 )
 async def logout(
     response: Response,
-    cache: RedisDep,
     refresh_token: RefreshTokenDep,
 ):
-    exp = int(refresh_token.exp.timestamp())
+    family = getattr(refresh_token, "fam", None)
 
-    await cache.set(
-        name=f"blacklist:{refresh_token.jti}",
-        value=1,
-        exat=exp,
-    )
+    if family is not None:
+        await refresh_families.revoke(refresh_token.sub, family)
+    else:
+        exp = int(refresh_token.exp.timestamp())
+        await token_blacklist.add(refresh_token.jti, exat=exp)
 
     response.delete_cookie("refresh_token", httponly=True)
     response.delete_cookie("access_token", httponly=True)
@@ -370,10 +432,25 @@ async def logout(
 async def refresh(
     response: Response,
     refresh_token: RefreshTokenDep,
-    cache: RedisDep,
 ):
-    print(refresh_token.jti)
-    if await cache.exists(f"blacklist:{refresh_token.jti}"):
+    family = getattr(refresh_token, "fam", None)
+
+    try:
+        if family is None:
+            if await token_blacklist.contains(refresh_token.jti):
+                raise SessionRevokedError
+            # старый токен без семейства после переноса в семейство должен
+            # стать одноразовым, иначе по нему можно заводить новые сессии
+            exp = int(refresh_token.exp.timestamp())
+            await token_blacklist.add(refresh_token.jti, exat=exp)
+            family, generation = await refresh_families.start(refresh_token.sub)
+        else:
+            generation = await refresh_families.rotate(
+                uid=refresh_token.sub,
+                family=family,
+                generation=getattr(refresh_token, "gen", 0),
+            )
+    except SessionRevokedError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Токен не действителен.",
@@ -381,15 +458,32 @@ async def refresh(
 
     new_access_token = security.create_access_token(
         uid=refresh_token.sub,
+        data={"fam": family},
     )
+    new_refresh_token = security.create_refresh_token(
+        uid=refresh_token.sub,
+        expiry=timedelta(days=7),
+        data={"fam": family, "gen": generation},
+    )
+
     response.set_cookie(
         key="access_token",
         value=new_access_token,
         httponly=True,
         samesite="lax",
     )
+    response.set_cookie(
+        key="refresh_token",
+        value=new_refresh_token,
+        httponly=True,
+        samesite="lax",
+    )
 
-    return {"status": "OK"}
+    return {
+        "status": "OK",
+        "access_token": new_access_token,
+        "refresh_token": new_refresh_token,
+    }
 
 
 router.include_router(rb_router)
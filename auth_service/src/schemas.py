@@ -1,4 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
+
+# $2b$12$ + 22 символа соли + 31 символ хеша
+BCRYPT_HASH_PATTERN = r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$"
 
 
 class EmailSchema(BaseModel):
@@ -15,6 +18,26 @@ class UserSchema(EmailSchema):
     password: str | None = Field(min_length=8, max_length=255)
 
 
+class ImportUserSchema(EmailSchema):
+    username: str | None = Field(default=None, min_length=3, max_length=16)
+    password: str | None = Field(default=None, min_length=8, max_length=255)
+    password_hash: str | None = Field(default=None, pattern=BCRYPT_HASH_PATTERN)
+    email_verified: bool = True
+
+    @model_validator(mode="after")
+    def check_password(self):
+        if self.password is not None and self.password_hash is not None:
+            raise ValueError("Укажите либо password, либо password_hash")
+
+        # без пароля можно только предрегистрация по email, иначе у
+        # пользователя с логином не будет способа войти
+        has_password = self.password is not None or self.password_hash is not None
+        if self.username is not None and not has_password:
+            raise ValueError("Для username нужен password или password_hash")
+
+        return self
+
+
 class SetCredentialsSchema(UserLoginSchema):
     pass
 
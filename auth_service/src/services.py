@@ -1,35 +1,161 @@
+import math
+
+from datetime import datetime
 from typing import Annotated, Any, Sequence
 
 from fastapi import Depends
-from sqlalchemy import and_, exists, select, update
+from redis.exceptions import RedisError
+from sqlalchemy import and_, delete, exists, func, inspect, not_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .db import SessionDep
+from .cache import SingleFlight, TTLCache
+from .db import ReadSessionDep, SessionDep
 from .models import UserModel
+from .redis import redis_client
+from .settings import settings
+
+CACHEABLE_FIELDS = ("id", "email", "username")
+# кеш локален для процесса, и после смены пароля другие воркеры держали бы
+# старый хеш до истечения TTL — проверки пароля идут мимо кеша
+UNCACHED_COLUMNS = ("password",)
+
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAXSIZE,
+    ttl=settings.USER_CACHE_TTL,
+)
+user_flight = SingleFlight()
+
+# метка в Redis на записанного пользователя: пока реплики могут отставать,
+# его читают из primary все воркеры, остальные чтения идут в реплики
+WRITE_MARK_PREFIX = "user:written:"
 
 
 class UserService:
     def __init__(
         self,
         session: AsyncSession,
+        read_session: AsyncSession | None = None,
     ) -> None:
         self.session = session
+        self.read_session = read_session or session
+        self.pinned = False
 
     @classmethod
     def from_session(
         cls,
         session: SessionDep,
+        read_session: ReadSessionDep,
     ):
-        return cls(session)
+        return cls(session, read_session)
+
+    @property
+    def replicated(self) -> bool:
+        return self.read_session is not self.session
+
+    def pin_primary(self) -> None:
+        self.pinned = True
+
+    async def _reader(self, **filters) -> AsyncSession:
+        if self.pinned or not self.replicated:
+            return self.session
+
+        key = self._cache_key(**filters)
+        if key is None:
+            return self.read_session
+
+        try:
+            written = await redis_client.exists(self._write_mark(*key))
+        except RedisError:
+            return self.session
+
+        return self.session if written else self.read_session
+
+    async def _written(self, *identifiers: tuple[str, Any]) -> None:
+        self.pinned = True
+
+        if not self.replicated or not identifiers:
+            return
+
+        ttl = max(1, math.ceil(settings.DATABASE_REPLICA_MAX_LAG))
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for field_name, value in identifiers:
+                    pipe.set(self._write_mark(field_name, str(value)), 1, ex=ttl)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    def _write_mark(self, field_name: str, value: str) -> str:
+        return f"{WRITE_MARK_PREFIX}{field_name}:{value}"
+
+    def _identifiers(self, *users) -> list[tuple[str, Any]]:
+        return [
+            (field_name, getattr(user, field_name))
+            for user in users
+            for field_name in CACHEABLE_FIELDS
+            if getattr(user, field_name) is not None
+        ]
 
     async def get(
         self,
         **filters,
+    ) -> UserModel | None:
+        if self.pinned:
+            return await self._fetch(self.session, **filters)
+
+        key = self._cache_key(**filters)
+
+        if key is not None:
+            data = user_cache.get(key)
+            if data is not None:
+                return UserModel(**data)
+
+        generation = user_cache.generation
+        session = await self._reader(**filters)
+        data = await user_flight.do(
+            (
+                generation,
+                session is self.session,
+                *sorted((name, str(value)) for name, value in filters.items()),
+            ),
+            lambda: self._fetch_snapshot(session, **filters),
+        )
+
+        if data is None:
+            return None
+
+        # пока шёл запрос, запись могли изменить — такой снимок не кешируем
+        if key is not None and user_cache.generation == generation:
+            user_cache.set(key, data)
+
+        return UserModel(**data)
+
+    async def get_with_password(
+        self,
+        **filters,
+    ) -> UserModel | None:
+        # проверка пароля читает только primary: сразу после смены пароля
+        # реплика ещё может отдавать прежний хеш
+        return await self._fetch(self.session, **filters)
+
+    async def _fetch(
+        self,
+        session: AsyncSession,
+        **filters,
     ) -> UserModel | None:
         stmt = select(UserModel).where(and_(*self._build_conditions(**filters)))
-        result = await self.session.execute(stmt)
+        result = await session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def _fetch_snapshot(
+        self,
+        session: AsyncSession,
+        **filters,
+    ) -> dict[str, Any] | None:
+        user = await self._fetch(session, **filters)
+        return self._snapshot(user) if user is not None else None
+
     async def create(
         self,
         email: str,
@@ -43,14 +169,94 @@ class UserService:
         )
         self.session.add(user)
         await self.session.commit()
+        await self._written(*self._identifiers(user))
+
+        self._invalidate(email=email)
+        if username is not None:
+            self._invalidate(username=username)
+
+    async def get_or_create(
+        self,
+        email: str,
+    ) -> UserModel | None:
+        # повторная регистрация неподтверждённой почты продлевает ей жизнь,
+        # иначе очистка удалила бы запись вместе с только что выданной ссылкой
+        insert = self._insert().values(email=email)
+        stmt = insert.on_conflict_do_update(
+            index_elements=[UserModel.email],
+            set_={"created_at": func.now()},
+            where=not_(UserModel.email_verified),
+        ).returning(UserModel)
+
+        # уже загруженный в сессию объект должен получить новый created_at
+        result = await self.session.execute(
+            stmt, execution_options={"populate_existing": True}
+        )
+        user = result.scalar_one_or_none()
+        await self.session.commit()
+
+        if user is not None:
+            await self._written(*self._identifiers(user))
+            self._invalidate(email=email)
+            return user
+
+        # строку не тронули: почта уже подтверждена
+        self.pin_primary()
+        return await self.get(email=email)
+
+    async def bulk_create(
+        self,
+        rows: list[dict[str, Any]],
+    ) -> int:
+        if not rows:
+            return 0
+
+        # один executemany на пачку, существующие email/username пропускаются
+        stmt = self._insert().on_conflict_do_nothing().returning(UserModel.id)
+
+        result = await self.session.execute(stmt, rows)
+        inserted = len(result.all())
+        await self.session.commit()
+        await self._written()
+
+        return inserted
+
+    async def delete_unverified(
+        self,
+        created_before: datetime,
+        limit: int,
+    ) -> Sequence[int]:
+        # удаляем по id из ограниченной выборки, чтобы не держать долгие блокировки
+        ids = (
+            select(UserModel.id)
+            .where(
+                not_(UserModel.email_verified),
+                UserModel.created_at < created_before,
+            )
+            .order_by(UserModel.created_at)
+            .limit(limit)
+        )
+        stmt = delete(UserModel).where(UserModel.id.in_(ids)).returning(UserModel.id)
+
+        result = await self.session.execute(stmt)
+        deleted_ids = result.scalars().all()
+        await self.session.commit()
+        await self._written(*(("id", user_id) for user_id in deleted_ids))
+
+        if deleted_ids:
+            deleted = set(deleted_ids)
+            user_cache.delete_where(lambda data: data.get("id") in deleted)
+
+        return deleted_ids
 
     async def exists(
         self,
         **filters,
     ) -> bool:
         stmt = select(exists().where(and_(*self._build_conditions(**filters))))
+        session = await self._reader(**filters)
 
-        return bool(await self.session.scalar(stmt))
+        return bool(await session.scalar(stmt))
 
     async def update(
         self,
@@ -71,11 +277,69 @@ class UserService:
             updated_rows = result.scalars().all()
 
             await self.session.commit()
+            await self._written(*self._identifiers(*updated_rows))
+            self._invalidate(**filters)
 
             return updated_rows
 
-        await self.session.execute(stmt)
+        if self.replicated:
+            # какие пользователи изменились, нужно знать для меток записи
+            stmt = stmt.returning(*(getattr(UserModel, f) for f in CACHEABLE_FIELDS))
+
+        result = await self.session.execute(stmt)
+        updated_rows = result.all() if self.replicated else []
         await self.session.commit()
+        await self._written(*self._identifiers(*updated_rows))
+        self._invalidate(**filters)
+
+    def _insert(self):
+        dialect = self.session.bind.dialect.name
+
+        if dialect == "postgresql":
+            return postgresql.insert(UserModel)
+        if dialect == "sqlite":
+            return sqlite.insert(UserModel)
+
+        raise ValueError(f"Диалект '{dialect}' не поддерживается")
+
+    def _cache_key(self, **filters):
+        if len(filters) != 1:
+            return None
+
+        ((field_name, value),) = filters.items()
+
+        if field_name not in CACHEABLE_FIELDS:
+            return None
+
+        return field_name, str(value)
+
+    def _snapshot(self, user: UserModel) -> dict[str, Any]:
+        return {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(UserModel).column_attrs
+            if attr.key not in UNCACHED_COLUMNS
+        }
+
+    def _invalidate(self, **filters) -> None:
+        # по ключевым полям, если они есть: прочие условия (например, прежний
+        # хеш пароля) в кешированном снимке могут отсутствовать или устареть
+        keys = {
+            field_name: value
+            for field_name, value in filters.items()
+            if field_name in CACHEABLE_FIELDS
+        }
+        values = {
+            field_name: str(value)
+            for field_name, value in (keys or filters).items()
+            if field_name not in UNCACHED_COLUMNS
+        }
+
+        user_cache.delete_where(
+            lambda data: all(
+                str(data.get(field_name)) == value
+                for field_name, value in values.items()
+            )
+        )
 
     def _build_conditions(self, **filters):
         if not filters:
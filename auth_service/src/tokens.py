@@ -0,0 +1,367 @@
+import hashlib
+import hmac
+import json
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Annotated
+
+from fastapi import Depends
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from redis.asyncio import Redis
+
+from .outbox import OUTBOX_STREAM
+from .redis import RedisDep, redis_client
+from .settings import settings
+from .utils import generate_token
+
+# Письмо со ссылкой кладётся в outbox тем же скриптом, что и токен,
+# поэтому токен без письма (и наоборот) появиться не может.
+
+# KEYS[1] - token:{email}, KEYS[2] - email:{token}, KEYS[3] - outbox
+# ARGV[1] - email, ARGV[2] - token, ARGV[3] - lifetime,
+# ARGV[4] - queue, ARGV[5] - message
+ISSUE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+redis.call("SET", KEYS[2], ARGV[1], "EX", ARGV[3])
+redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3])
+redis.call("XADD", KEYS[3], "*", "queue", ARGV[4], "payload", ARGV[5])
+return 1
+"""
+
+# KEYS[1] - token:{email}, KEYS[2] - outbox
+# ARGV[1] - email, ARGV[2] - new token, ARGV[3] - lifetime,
+# ARGV[4] - min resend interval, ARGV[5] - prefix of email:{token},
+# ARGV[6] - queue, ARGV[7] - message
+ROTATE_SCRIPT = """
+local ttl = redis.call("TTL", KEYS[1])
+if ttl <= 0 then
+    return -1
+end
+local remains = tonumber(ARGV[4]) - (tonumber(ARGV[3]) - ttl)
+if remains > 0 then
+    return remains
+end
+local old_token = redis.call("GET", KEYS[1])
+redis.call("DEL", ARGV[5] .. old_token)
+redis.call("SET", ARGV[5] .. ARGV[2], ARGV[1], "EX", ARGV[3])
+redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3])
+redis.call("XADD", KEYS[2], "*", "queue", ARGV[6], "payload", ARGV[7])
+return 0
+"""
+
+# KEYS[1] - email:{token}
+# ARGV[1] - token, ARGV[2] - prefix of token:{email}
+CONSUME_SCRIPT = """
+local email = redis.call("GET", KEYS[1])
+if not email then
+    return false
+end
+redis.call("DEL", KEYS[1])
+local token_key = ARGV[2] .. email
+if redis.call("GET", token_key) == ARGV[1] then
+    redis.call("DEL", token_key)
+end
+return email
+"""
+
+# KEYS[1] - cooldown:{email}, KEYS[2] - outbox
+# ARGV[1] - cooldown, ARGV[2] - queue, ARGV[3] - message
+SIGNED_ISSUE_SCRIPT = """
+if not redis.call("SET", KEYS[1], 1, "NX", "EX", ARGV[1]) then
+    return redis.call("TTL", KEYS[1])
+end
+redis.call("XADD", KEYS[2], "*", "queue", ARGV[2], "payload", ARGV[3])
+return 0
+"""
+
+issue_script = redis_client.register_script(ISSUE_SCRIPT)
+rotate_script = redis_client.register_script(ROTATE_SCRIPT)
+consume_script = redis_client.register_script(CONSUME_SCRIPT)
+signed_issue_script = redis_client.register_script(SIGNED_ISSUE_SCRIPT)
+
+
+async def load_token_scripts() -> None:
+    for script in (issue_script, rotate_script, consume_script, signed_issue_script):
+        await redis_client.script_load(script.script)
+
+
+class TokenNotFoundError(Exception):
+    pass
+
+
+class TokenCooldownError(Exception):
+    def __init__(self, remains: int) -> None:
+        super().__init__(remains)
+        self.remains = remains
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    email: str
+    fingerprint: str | None = None
+
+
+class TokenStore(ABC):
+    def __init__(
+        self,
+        cache: Redis,
+        purpose: str,
+        lifetime: int,
+    ) -> None:
+        self.cache = cache
+        self.purpose = purpose
+        self.lifetime = lifetime
+
+    def _message(self, email: str, token: str) -> str:
+        # токен уникален для каждого письма, поэтому ключ совпадает только
+        # у повторных доставок одного и того же сообщения
+        idempotency_key = hashlib.sha256(f"{self.purpose}:{token}".encode())
+
+        return json.dumps(
+            {
+                "email": email,
+                "link": settings.BASE_URL + f"{self.purpose}?token={token}",
+                "idempotency_key": idempotency_key.hexdigest(),
+            }
+        )
+
+    @abstractmethod
+    async def issue(
+        self,
+        email: str,
+        queue: str,
+        password_hash: str | None = None,
+    ) -> str | None: ...
+
+    @abstractmethod
+    async def rotate(
+        self,
+        email: str,
+        min_resend_interval: int,
+        queue: str,
+        password_hash: str | None = None,
+    ) -> str: ...
+
+    @abstractmethod
+    async def peek(
+        self,
+        token: str,
+    ) -> TokenClaims | None: ...
+
+    @abstractmethod
+    async def consume(
+        self,
+        token: str,
+    ) -> TokenClaims | None: ...
+
+    def is_current(
+        self,
+        claims: TokenClaims,
+        password_hash: str | None,
+    ) -> bool:
+        return True
+
+
+class RedisTokenStore(TokenStore):
+    @property
+    def token_prefix(self) -> str:
+        return f"{self.purpose}:token:"
+
+    @property
+    def email_prefix(self) -> str:
+        return f"{self.purpose}:email:"
+
+    async def issue(
+        self,
+        email: str,
+        queue: str,
+        password_hash: str | None = None,
+    ) -> str | None:
+        token = generate_token()
+
+        issued = await issue_script(
+            keys=[
+                self.token_prefix + email,
+                self.email_prefix + token,
+                OUTBOX_STREAM,
+            ],
+            args=[email, token, self.lifetime, queue, self._message(email, token)],
+            client=self.cache,
+        )
+
+        return token if issued else None
+
+    async def rotate(
+        self,
+        email: str,
+        min_resend_interval: int,
+        queue: str,
+        password_hash: str | None = None,
+    ) -> str:
+        token = generate_token()
+
+        result = await rotate_script(
+            keys=[self.token_prefix + email, OUTBOX_STREAM],
+            args=[
+                email,
+                token,
+                self.lifetime,
+                min_resend_interval,
+                self.email_prefix,
+                queue,
+                self._message(email, token),
+            ],
+            client=self.cache,
+        )
+
+        if result < 0:
+            raise TokenNotFoundError
+        if result > 0:
+            raise TokenCooldownError(result)
+
+        return token
+
+    async def peek(
+        self,
+        token: str,
+    ) -> TokenClaims | None:
+        email = await self.cache.get(self.email_prefix + token)
+
+        return TokenClaims(email=email.decode()) if email else None
+
+    async def consume(
+        self,
+        token: str,
+    ) -> TokenClaims | None:
+        email = await consume_script(
+            keys=[self.email_prefix + token],
+            args=[token, self.token_prefix],
+            client=self.cache,
+        )
+
+        return TokenClaims(email=email.decode()) if email else None
+
+
+class SignedTokenStore(TokenStore):
+    def __init__(
+        self,
+        cache: Redis,
+        purpose: str,
+        lifetime: int,
+        cooldown: int,
+        secret: str,
+    ) -> None:
+        super().__init__(cache, purpose, lifetime)
+        self.cooldown = cooldown
+        self.secret = secret.encode()
+        self.serializer = URLSafeTimedSerializer(secret, salt=purpose)
+
+    def fingerprint(self, password_hash: str | None) -> str:
+        return hmac.new(
+            self.secret,
+            (password_hash or "").encode(),
+            hashlib.sha256,
+        ).hexdigest()[:16]
+
+    async def issue(
+        self,
+        email: str,
+        queue: str,
+        password_hash: str | None = None,
+    ) -> str | None:
+        try:
+            return await self._issue(email, self.cooldown, queue, password_hash)
+        except TokenCooldownError:
+            return None
+
+    async def rotate(
+        self,
+        email: str,
+        min_resend_interval: int,
+        queue: str,
+        password_hash: str | None = None,
+    ) -> str:
+        return await self._issue(email, min_resend_interval, queue, password_hash)
+
+    async def _issue(
+        self,
+        email: str,
+        cooldown: int,
+        queue: str,
+        password_hash: str | None,
+    ) -> str:
+        token = self.serializer.dumps(
+            {"email": email, "fingerprint": self.fingerprint(password_hash)}
+        )
+
+        remains = await signed_issue_script(
+            keys=[f"{self.purpose}:cooldown:{email}", OUTBOX_STREAM],
+            args=[cooldown, queue, self._message(email, token)],
+            client=self.cache,
+        )
+
+        if remains:
+            raise TokenCooldownError(remains)
+
+        return token
+
+    async def peek(
+        self,
+        token: str,
+    ) -> TokenClaims | None:
+        try:
+            data = self.serializer.loads(token, max_age=self.lifetime)
+        except BadSignature:
+            return None
+
+        return TokenClaims(email=data["email"], fingerprint=data["fingerprint"])
+
+    async def consume(
+        self,
+        token: str,
+    ) -> TokenClaims | None:
+        # хранить нечего: после смены пароля токен перестаёт проходить is_current
+        return await self.peek(token)
+
+    def is_current(
+        self,
+        claims: TokenClaims,
+        password_hash: str | None,
+    ) -> bool:
+        return claims.fingerprint is not None and hmac.compare_digest(
+            claims.fingerprint,
+            self.fingerprint(password_hash),
+        )
+
+
+def get_verify_token_store(cache: RedisDep) -> TokenStore:
+    if settings.TOKEN_MODE == "signed":
+        return SignedTokenStore(
+            cache,
+            purpose="verify",
+            lifetime=settings.VERIFY_TOKEN_LIFETIME,
+            cooldown=settings.MIN_RESEND_TOKEN_LIFETIME,
+            secret=settings.TOKEN_SECRET_KEY,
+        )
+
+    return RedisTokenStore(cache, "verify", settings.VERIFY_TOKEN_LIFETIME)
+
+
+def get_reset_token_store(cache: RedisDep) -> TokenStore:
+    if settings.TOKEN_MODE == "signed":
+        return SignedTokenStore(
+            cache,
+            purpose="reset",
+            lifetime=settings.RESET_TOKEN_LIFETIME,
+            cooldown=settings.RESET_TOKEN_LIFETIME,
+            secret=settings.TOKEN_SECRET_KEY,
+        )
+
+    return RedisTokenStore(cache, "reset", settings.RESET_TOKEN_LIFETIME)
+
+
+VerifyTokenStoreDep = Annotated[TokenStore, Depends(get_verify_token_store)]
+ResetTokenStoreDep = Annotated[TokenStore, Depends(get_reset_token_store)]
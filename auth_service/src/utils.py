@@ -3,13 +3,18 @@ from secrets import token_urlsafe
 import bcrypt
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+def hash_password(password: str, rounds: int = 12) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed_password.encode())
 
 
+def hash_rounds(hashed_password: str) -> int:
+    # $2b$12$<salt+hash>
+    return int(hashed_password.split("$")[2])
+
+
 def generate_token():
     return token_urlsafe(32)
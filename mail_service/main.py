@@ -1,6 +1,37 @@
 from faststream import FastStream
 
-from src import subscribers  # noqa
+from src.batcher import mail_batcher
 from src.broker import broker
+from src.metrics import MetricsReporter
+from src.redis import close_redis
+from src.retry import retry_policy
+from src.settings import settings
+from src.smtp import smtp_pool
+from src.subscribers import consumers
 
 app = FastStream(broker)
+metrics_reporter = MetricsReporter(interval=settings.METRICS_INTERVAL)
+
+
+@app.on_startup
+async def start_smtp_pool():
+    await smtp_pool.start()
+
+
+@app.after_startup
+async def declare_retry_queues():
+    for consumer in consumers:
+        await retry_policy.declare(consumer.queue)
+    await metrics_reporter.start()
+
+
+@app.on_shutdown
+async def stop_metrics_reporter():
+    await metrics_reporter.stop()
+
+
+@app.after_shutdown
+async def close_smtp_pool():
+    await mail_batcher.close()
+    await smtp_pool.close()
+    await close_redis()
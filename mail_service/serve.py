@@ -0,0 +1,76 @@
+"""Многопроцессный запуск консьюмеров.
+
+Мастер-процесс один раз импортирует приложение (настройки и шаблоны
+загружаются здесь), после чего форкает WORKERS воркеров, каждый со своим
+подключением к RabbitMQ на uvloop. RabbitMQ сам распределяет сообщения между
+консьюмерами очереди, упавший воркер перезапускается.
+
+    WORKERS=4 python serve.py
+
+Каждый сервис собирается в образ из своего каталога (см.
+docker-compose.local.yml), поэтому общего пакета у них нет и лаунчер
+скопирован в auth_service, upload_video_service и mail_service. HTTP-версии
+совпадают, в mail_service вместо uvicorn запускается FastStream-приложение;
+правки вносятся во все три копии.
+"""
+
+import os
+import signal
+import time
+
+import uvloop
+
+from main import app
+from src.settings import settings
+
+
+def run_worker() -> None:
+    uvloop.run(app.run())
+
+
+def spawn_worker() -> int:
+    pid = os.fork()
+
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            run_worker()
+        finally:
+            os._exit(0)
+
+    return pid
+
+
+def main() -> None:
+    if settings.WORKERS <= 1:
+        run_worker()
+        return
+
+    workers = {spawn_worker() for _ in range(settings.WORKERS)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+
+        workers.discard(pid)
+
+        if not stopping:
+            time.sleep(1)
+            workers.add(spawn_worker())
+
+
+if __name__ == "__main__":
+    main()
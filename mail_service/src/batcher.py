@@ -0,0 +1,147 @@
+import asyncio
+
+from dataclasses import asdict, dataclass
+from email.message import EmailMessage
+
+import aiosmtplib
+
+from .settings import settings
+from .smtp import SMTPPool, smtp_pool
+
+
+@dataclass
+class BatcherStats:
+    batches: int = 0
+    sent: int = 0
+    failed: int = 0
+    full_flushes: int = 0
+    timed_flushes: int = 0
+    max_batch: int = 0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        total = self.sent + self.failed
+        data["avg_batch"] = total / self.batches if self.batches else 0.0
+        return data
+
+
+class MailBatcher:
+    def __init__(
+        self,
+        pool: SMTPPool,
+        max_size: int = 20,
+        max_delay_ms: int = 50,
+    ) -> None:
+        self.pool = pool
+        self.max_size = max_size
+        self.max_delay = max_delay_ms / 1000
+        self.stats = BatcherStats()
+
+        self._pending: list[tuple[EmailMessage, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def send(self, message: EmailMessage) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((message, future))
+
+        if len(self._pending) >= self.max_size:
+            self.stats.full_flushes += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_delay,
+                self._flush_on_timer,
+            )
+
+        # возвращаемся (и подтверждаем сообщение в RabbitMQ) только после
+        # того, как пачка с этим письмом отправлена
+        await future
+
+    async def close(self) -> None:
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush_on_timer(self) -> None:
+        self._timer = None
+        if self._pending:
+            self.stats.timed_flushes += 1
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._deliver(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(
+        self,
+        batch: list[tuple[EmailMessage, asyncio.Future]],
+    ) -> None:
+        self.stats.batches += 1
+        self.stats.max_batch = max(self.stats.max_batch, len(batch))
+
+        remaining = batch
+        error: Exception | None = None
+
+        try:
+            # одна повторная попытка на новом соединении, если сервер оборвал сессию
+            for _ in range(2):
+                try:
+                    async with self.pool.acquire() as client:
+                        while remaining:
+                            message, future = remaining[0]
+                            await self._send_one(client, message, future)
+                            remaining = remaining[1:]
+                    return
+                except aiosmtplib.SMTPServerDisconnected as e:
+                    error = e
+                except Exception as e:
+                    error = e
+                    break
+        finally:
+            for _, future in remaining:
+                self.stats.failed += 1
+                if future.done():
+                    continue
+                if error is None:
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+
+    async def _send_one(
+        self,
+        client: aiosmtplib.SMTP,
+        message: EmailMessage,
+        future: asyncio.Future,
+    ) -> None:
+        # каждое письмо — отдельная транзакция MAIL FROM/RCPT/DATA в общей сессии
+        try:
+            await client.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            raise
+        except aiosmtplib.SMTPException as e:
+            # отказ по конкретному письму не рвёт сессию для остальных
+            self.stats.failed += 1
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        self.stats.sent += 1
+        if not future.done():
+            future.set_result(None)
+
+
+mail_batcher = MailBatcher(
+    pool=smtp_pool,
+    max_size=settings.SMTP_BATCH_SIZE,
+    max_delay_ms=settings.SMTP_BATCH_DELAY_MS,
+)
@@ -0,0 +1,68 @@
+import asyncio
+
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+
+from faststream.rabbit import Channel
+
+from .settings import settings
+
+
+@dataclass
+class ConsumerStats:
+    in_flight: int = 0
+    max_in_flight: int = 0
+    processed: int = 0
+    failed: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class QueueConsumer:
+    def __init__(
+        self,
+        queue: str,
+        concurrency: int,
+        prefetch: int,
+    ) -> None:
+        self.queue = queue
+        self.concurrency = concurrency
+        self.prefetch = max(prefetch, concurrency)
+        self.stats = ConsumerStats()
+
+        # global_qos=False: лимит действует на каждого консьюмера отдельно,
+        # даже если очереди с одинаковыми настройками делят канал
+        self.channel = Channel(prefetch_count=self.prefetch, global_qos=False)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._semaphore:
+            self.stats.in_flight += 1
+            self.stats.max_in_flight = max(
+                self.stats.max_in_flight,
+                self.stats.in_flight,
+            )
+            try:
+                yield
+            except BaseException:
+                self.stats.failed += 1
+                raise
+            else:
+                self.stats.processed += 1
+            finally:
+                self.stats.in_flight -= 1
+
+
+def make_consumer(queue: str) -> QueueConsumer:
+    concurrency = settings.CONSUMER_CONCURRENCY.get(
+        queue,
+        settings.CONSUMER_DEFAULT_CONCURRENCY,
+    )
+    prefetch = settings.CONSUMER_PREFETCH.get(
+        queue,
+        concurrency * settings.CONSUMER_PREFETCH_MULTIPLIER,
+    )
+
+    return QueueConsumer(queue=queue, concurrency=concurrency, prefetch=prefetch)
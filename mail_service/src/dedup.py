@@ -0,0 +1,104 @@
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .redis import redis_client
+from .retry import DeferDelivery
+from .settings import settings
+
+DEDUP_PREFIX = "mail:sent:"
+SENT = b"sent"
+
+
+class DeliveryInProgressError(DeferDelivery):
+    pass
+
+
+@dataclass
+class DedupStats:
+    claimed: int = 0
+    duplicates: int = 0
+    in_progress: int = 0
+    unkeyed: int = 0
+    redis_errors: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class DeliveryDeduplicator:
+    def __init__(
+        self,
+        cache: Redis,
+        ttl: int,
+        pending_ttl: int,
+    ) -> None:
+        self.cache = cache
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.stats = DedupStats()
+
+    async def _claim(self, key: str) -> bytes | None:
+        # короткий TTL на время отправки: если воркер упадёт, ключ истечёт
+        # и повторная доставка сможет отправить письмо
+        try:
+            if await self.cache.set(
+                DEDUP_PREFIX + key,
+                "pending",
+                nx=True,
+                ex=self.pending_ttl,
+            ):
+                return None
+
+            # ключ мог истечь между SET и GET — тогда письмо ещё не отправлено
+            return await self.cache.get(DEDUP_PREFIX + key) or b"pending"
+        except RedisError:
+            self.stats.redis_errors += 1
+            return None
+
+    async def _finish(self, key: str, delivered: bool) -> None:
+        try:
+            if delivered:
+                await self.cache.set(DEDUP_PREFIX + key, "sent", ex=self.ttl)
+            else:
+                await self.cache.delete(DEDUP_PREFIX + key)
+        except RedisError:
+            self.stats.redis_errors += 1
+
+    @asynccontextmanager
+    async def once(self, key: str | None):
+        if key is None:
+            self.stats.unkeyed += 1
+            yield True
+            return
+
+        state = await self._claim(key)
+
+        if state == SENT:
+            self.stats.duplicates += 1
+            yield False
+            return
+
+        if state is not None:
+            # письмо отправляет другой воркер либо тот, что упал на отправке;
+            # подтверждать нельзя, иначе письмо потеряется
+            self.stats.in_progress += 1
+            raise DeliveryInProgressError(f"письмо {key} уже отправляется")
+
+        self.stats.claimed += 1
+        try:
+            yield True
+        except BaseException:
+            await self._finish(key, delivered=False)
+            raise
+
+        await self._finish(key, delivered=True)
+
+
+deduplicator = DeliveryDeduplicator(
+    cache=redis_client,
+    ttl=settings.DEDUP_TTL,
+    pending_ttl=settings.DEDUP_PENDING_TTL,
+)
@@ -1,7 +1,6 @@
 from email.message import EmailMessage
 
-import aiosmtplib
-
+from .batcher import mail_batcher
 from .settings import settings
 from .utils import get_subject_and_body
 
@@ -18,14 +17,7 @@ async def send_email(
 
     message.add_alternative(body, subtype="html")
 
-    await aiosmtplib.send(
-        message,
-        hostname=settings.EMAIL_HOST,
-        port=settings.EMAIL_PORT,
-        username=settings.EMAIL_HOST_USER,
-        password=settings.EMAIL_HOST_PASSWORD,
-        use_tls=True,
-    )
+    await mail_batcher.send(message)
 
 
 async def handle_email_message(
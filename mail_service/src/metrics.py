@@ -0,0 +1,57 @@
+import asyncio
+import json
+import logging
+
+from .batcher import mail_batcher
+from .dedup import deduplicator
+from .retry import retry_policy
+from .smtp import smtp_pool
+from .subscribers import consumers
+
+logger = logging.getLogger("mail_service.metrics")
+
+
+async def collect_metrics() -> dict:
+    for consumer in consumers:
+        await retry_policy.dlq_depth(consumer.queue)
+
+    return {
+        "consumers": {
+            consumer.queue: consumer.stats.as_dict() for consumer in consumers
+        },
+        "retry": retry_policy.stats.as_dict(),
+        "dedup": deduplicator.stats.as_dict(),
+        "batcher": mail_batcher.stats.as_dict(),
+        "smtp_pool": smtp_pool.stats.as_dict(),
+    }
+
+
+class MetricsReporter:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                logger.info(json.dumps(await collect_metrics()))
+            except Exception:
+                logger.exception("Не удалось собрать метрики")
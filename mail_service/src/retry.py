@@ -0,0 +1,132 @@
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+
+from faststream.rabbit import RabbitBroker, RabbitQueue
+from faststream.rabbit.message import RabbitMessage
+
+from .broker import broker
+from .settings import settings
+
+ATTEMPT_HEADER = "x-attempt"
+
+
+class DeferDelivery(Exception):
+    pass
+
+
+@dataclass
+class RetryStats:
+    retried: int = 0
+    deferred: int = 0
+    dead_lettered: int = 0
+    dlq_depth: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        broker: RabbitBroker,
+        max_attempts: int = 5,
+        base_delay_ms: int = 5000,
+        multiplier: int = 2,
+    ) -> None:
+        self.broker = broker
+        self.max_attempts = max_attempts
+        self.base_delay_ms = base_delay_ms
+        self.multiplier = multiplier
+        self.stats = RetryStats()
+
+    def delay_ms(self, attempt: int) -> int:
+        return self.base_delay_ms * self.multiplier ** (attempt - 1)
+
+    def retry_queue(self, queue: str, attempt: int) -> RabbitQueue:
+        # отложенная очередь без консьюмеров: по истечении TTL сообщение
+        # возвращается через default exchange в исходную очередь; задержка
+        # входит в имя, иначе смена настроек ломала бы повторное объявление
+        delay_ms = self.delay_ms(attempt)
+        return RabbitQueue(
+            f"{queue}.retry.{delay_ms}ms",
+            durable=True,
+            arguments={
+                "x-message-ttl": delay_ms,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue,
+            },
+        )
+
+    def dead_letter_queue(self, queue: str) -> RabbitQueue:
+        return RabbitQueue(f"{queue}.dlq", durable=True)
+
+    async def declare(self, queue: str) -> None:
+        for attempt in range(1, self.max_attempts):
+            await self.broker.declare_queue(self.retry_queue(queue, attempt))
+        await self.broker.declare_queue(self.dead_letter_queue(queue))
+
+    async def dlq_depth(self, queue: str) -> int:
+        # declare_queue возвращает закешированную очередь с результатом первого
+        # объявления, поэтому глубину каждый раз спрашиваем пассивным declare
+        declared = await self.broker.declare_queue(self.dead_letter_queue(queue))
+        channel = await declared.channel.get_underlay_channel()
+        result = await channel.queue_declare(declared.name, passive=True)
+        depth = result.message_count or 0
+        self.stats.dlq_depth[queue] = depth
+        return depth
+
+    @asynccontextmanager
+    async def guard(self, queue: str, message: RabbitMessage, logger):
+        try:
+            yield
+        except DeferDelivery as e:
+            # отправить пока нельзя, но и попыткой это не считается: сообщение
+            # возвращается через первую отложенную очередь с прежним счётчиком
+            attempt = int(message.headers.get(ATTEMPT_HEADER, 0))
+            target = self.retry_queue(queue, max(attempt, 1))
+            self.stats.deferred += 1
+
+            logger.info(f"{queue}: {e}, сообщение отложено в {target.name}")
+            await self._republish(message, target, message.headers)
+        except Exception as e:
+            # сообщение перекладывается в отложенную очередь или DLQ, а исходное
+            # подтверждается — слот консьюмера не ждёт следующей попытки
+            attempt = int(message.headers.get(ATTEMPT_HEADER, 0)) + 1
+            headers = {**message.headers, ATTEMPT_HEADER: attempt}
+
+            if attempt < self.max_attempts:
+                target = self.retry_queue(queue, attempt)
+                self.stats.retried += 1
+            else:
+                target = self.dead_letter_queue(queue)
+                self.stats.dead_lettered += 1
+
+            logger.warning(
+                f"{queue}: попытка {attempt} не удалась: {e!r}, "
+                f"сообщение отправлено в {target.name}"
+            )
+            await self._republish(message, target, headers)
+
+    async def _republish(
+        self,
+        message: RabbitMessage,
+        target: RabbitQueue,
+        headers: dict,
+    ) -> None:
+        await self.broker.publish(
+            message.body,
+            queue=target,
+            headers=headers,
+            content_type=message.content_type,
+            message_id=message.message_id,
+            correlation_id=message.correlation_id,
+            persist=True,
+        )
+
+
+retry_policy = RetryPolicy(
+    broker=broker,
+    max_attempts=settings.RETRY_MAX_ATTEMPTS,
+    base_delay_ms=settings.RETRY_BASE_DELAY_MS,
+    multiplier=settings.RETRY_MULTIPLIER,
+)
@@ -0,0 +1,175 @@
+import asyncio
+import time
+
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+
+import aiosmtplib
+
+from .settings import settings
+
+
+@dataclass
+class SMTPPoolStats:
+    created: int = 0
+    reused: int = 0
+    discarded: int = 0
+    keepalives: int = 0
+    expired: int = 0
+    in_use: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class SMTPPool:
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str,
+        password: str,
+        use_tls: bool = True,
+        size: int = 5,
+        idle_timeout: float = 60.0,
+        keepalive_interval: float = 20.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.timeout = timeout
+        self.stats = SMTPPoolStats()
+
+        # свободные соединения: (клиент, время последнего использования)
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._semaphore = asyncio.Semaphore(size)
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._keepalive())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._quit(client) for client, _ in idle))
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        self.stats.created += 1
+
+        return client
+
+    async def _quit(self, client: aiosmtplib.SMTP) -> None:
+        try:
+            await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+
+    async def _discard(self, client: aiosmtplib.SMTP) -> None:
+        self.stats.discarded += 1
+        await self._quit(client)
+
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            # последнее возвращённое соединение — самое «тёплое»
+            client, last_used = self._idle.pop()
+            idle_for = time.monotonic() - last_used
+
+            if idle_for > self.idle_timeout or not client.is_connected:
+                self.stats.expired += 1
+                await self._quit(client)
+                continue
+
+            if idle_for > self.keepalive_interval:
+                try:
+                    await client.noop()
+                except aiosmtplib.SMTPException:
+                    await self._discard(client)
+                    continue
+
+            self.stats.reused += 1
+            return client
+
+        return await self._connect()
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._semaphore:
+            client = await self._checkout()
+            self.stats.in_use += 1
+
+            try:
+                yield client
+            except aiosmtplib.SMTPException:
+                # после ошибки состояние сессии неизвестно,
+                # поэтому соединение не переиспользуем
+                await self._discard(client)
+                raise
+            except BaseException:
+                client.close()
+                raise
+            else:
+                self._idle.append((client, time.monotonic()))
+            finally:
+                self.stats.in_use -= 1
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+
+            now = time.monotonic()
+            idle, self._idle = self._idle, []
+            alive = []
+
+            for client, last_used in idle:
+                if now - last_used > self.idle_timeout:
+                    self.stats.expired += 1
+                    await self._quit(client)
+                    continue
+
+                try:
+                    await client.noop()
+                except aiosmtplib.SMTPException:
+                    await self._discard(client)
+                    continue
+
+                self.stats.keepalives += 1
+                alive.append((client, last_used))
+
+            # пока шла проверка, могли вернуться другие соединения
+            self._idle = alive + self._idle
+
+
+smtp_pool = SMTPPool(
+    hostname=settings.EMAIL_HOST,
+    port=settings.EMAIL_PORT,
+    username=settings.EMAIL_HOST_USER,
+    password=settings.EMAIL_HOST_PASSWORD,
+    use_tls=settings.EMAIL_USE_SSL,
+    size=settings.SMTP_POOL_SIZE,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+    keepalive_interval=settings.SMTP_KEEPALIVE_INTERVAL,
+    timeout=settings.SMTP_TIMEOUT,
+)
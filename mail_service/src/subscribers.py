@@ -1,41 +1,98 @@
 from faststream import Logger
+from faststream.middlewares import AckPolicy
+from faststream.rabbit import RabbitMessage
 
 from .broker import broker
+from .consumers import make_consumer
+from .dedup import deduplicator
 from .mailer import handle_email_message
+from .retry import retry_policy
 
+verify_consumer = make_consumer("send_verify_token")
+resend_verify_consumer = make_consumer("resend_verify_token")
+reset_password_consumer = make_consumer("send_reset_password_token")
 
-@broker.subscriber("send_verify_token")
+consumers = [verify_consumer, resend_verify_consumer, reset_password_consumer]
+
+
+# ошибки отправки обрабатывает retry_policy; если не удалось даже переложить
+# сообщение в отложенную очередь — nack с возвратом в очередь
+@broker.subscriber(
+    "send_verify_token",
+    channel=verify_consumer.channel,
+    ack_policy=AckPolicy.NACK_ON_ERROR,
+)
 async def send_verify_mail_token(
     email: str,
     link: str,
     logger: Logger,
+    message: RabbitMessage,
+    idempotency_key: str | None = None,
 ):
     logger.info(f"send_verify_token: {email=} {link=}")
 
-    await handle_email_message(
-        email=email,
-        link=link,
-        type_="verify",
-    )
+    async with (
+        verify_consumer.slot(),
+        retry_policy.guard("send_verify_token", message, logger),
+        deduplicator.once(idempotency_key) as fresh,
+    ):
+        if fresh:
+            await handle_email_message(
+                email=email,
+                link=link,
+                type_="verify",
+            )
 
 
-@broker.subscriber("resend_verify_token")
-async def resend_verify_mail_token(email: str, link: str, logger: Logger):
+@broker.subscriber(
+    "resend_verify_token",
+    channel=resend_verify_consumer.channel,
+    ack_policy=AckPolicy.NACK_ON_ERROR,
+)
+async def resend_verify_mail_token(
+    email: str,
+    link: str,
+    logger: Logger,
+    message: RabbitMessage,
+    idempotency_key: str | None = None,
+):
     logger.info(f"resend_verify_token: {email=} {link=}")
 
-    await handle_email_message(
-        email=email,
-        link=link,
-        type_="verify",
-    )
+    async with (
+        resend_verify_consumer.slot(),
+        retry_policy.guard("resend_verify_token", message, logger),
+        deduplicator.once(idempotency_key) as fresh,
+    ):
+        if fresh:
+            await handle_email_message(
+                email=email,
+                link=link,
+                type_="verify",
+            )
 
 
-@broker.subscriber("send_reset_password_token")
-async def send_reset_password_token(email: str, link: str, logger: Logger):
+@broker.subscriber(
+    "send_reset_password_token",
+    channel=reset_password_consumer.channel,
+    ack_policy=AckPolicy.NACK_ON_ERROR,
+)
+async def send_reset_password_token(
+    email: str,
+    link: str,
+    logger: Logger,
+    message: RabbitMessage,
+    idempotency_key: str | None = None,
+):
     logger.info(f"send_reset_password_token: {email=} {link=}")
 
-    await handle_email_message(
-        email=email,
-        link=link,
-        type_="reset",
-    )
+    async with (
+        reset_password_consumer.slot(),
+        retry_policy.guard("send_reset_password_token", message, logger),
+        deduplicator.once(idempotency_key) as fresh,
+    ):
+        if fresh:
+            await handle_email_message(
+                email=email,
+                link=link,
+                type_="reset",
+            )
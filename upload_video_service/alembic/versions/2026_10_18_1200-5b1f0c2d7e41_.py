@@ -0,0 +1,35 @@
+"""add videos_metadata.user_id
+
+Revision ID: 5b1f0c2d7e41
+Revises: 26db5fdb25e6
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1f0c2d7e41"
+down_revision: Union[str, Sequence[str], None] = "26db5fdb25e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("videos_metadata") as batch_op:
+        batch_op.add_column(sa.Column("user_id", sa.Integer(), nullable=True))
+        batch_op.create_index(
+            batch_op.f("ix_videos_metadata_user_id"), ["user_id"], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("videos_metadata") as batch_op:
+        batch_op.drop_index(batch_op.f("ix_videos_metadata_user_id"))
+        batch_op.drop_column("user_id")
@@ -1,11 +1,33 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from src.auth import access_token_verifier, public_keys
+from src.dependencies import MetricsAccessDep
+from src.redis import close_redis
 from src.routers import router as video_router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_redis()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(video_router, prefix="/api/v1", tags=["upload_video"])
 
 
 @app.get("/ping/upload_video_service")
 async def ping():
     return "PONG"
+
+
+@app.get("/metrics", dependencies=[MetricsAccessDep])
+async def metrics():
+    return {
+        "access_token": access_token_verifier.stats.as_dict(),
+        "token_cache": access_token_verifier.token_cache.stats.as_dict(),
+        "revocation_cache": access_token_verifier.revocation_cache.stats.as_dict(),
+        "jwks_fetches": public_keys.fetches,
+    }
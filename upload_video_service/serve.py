@@ -0,0 +1,99 @@
+"""Многопроцессный запуск сервиса.
+
+Мастер-процесс один раз импортирует приложение (настройки читаются
+здесь), после чего форкает SERVER_WORKERS воркеров. Каждый воркер
+открывает собственный слушающий сокет с SO_REUSEPORT, и ядро само
+распределяет соединения между ними. Воркеры работают на uvloop/httptools,
+упавший воркер перезапускается.
+
+    SERVER_WORKERS=4 python serve.py
+
+Сравнение пропускной способности с однопроцессным режимом - см.
+auth_service/serve.py и auth_service/benchmarks/http_throughput.py.
+
+Каждый сервис собирается в образ из своего каталога (см.
+docker-compose.local.yml), поэтому общего пакета у них нет и лаунчер
+скопирован в auth_service, upload_video_service и mail_service. HTTP-версии
+совпадают, в mail_service вместо uvicorn запускается FastStream-приложение;
+правки вносятся во все три копии.
+"""
+
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from main import app
+from src.settings import settings
+
+
+def bind_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((settings.SERVER_HOST, settings.SERVER_PORT))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker() -> None:
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.SERVER_BACKLOG,
+        access_log=settings.SERVER_ACCESS_LOG,
+    )
+    uvicorn.Server(config).run(sockets=[bind_socket()])
+
+
+def spawn_worker() -> int:
+    pid = os.fork()
+
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            run_worker()
+        finally:
+            os._exit(0)
+
+    return pid
+
+
+def main() -> None:
+    if settings.SERVER_WORKERS <= 1:
+        run_worker()
+        return
+
+    bind_socket().close()
+
+    workers = {spawn_worker() for _ in range(settings.SERVER_WORKERS)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+
+        workers.discard(pid)
+
+        if not stopping:
+            time.sleep(1)
+            workers.add(spawn_worker())
+
+
+if __name__ == "__main__":
+    main()
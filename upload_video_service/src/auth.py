@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import time
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import jwt
+
+from fastapi import HTTPException, Request, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .cache import TTLCache
+from .keys import PublicKeyCache
+from .redis import redis_client
+from .settings import settings
+
+# auth_service хранит каждую сессию (семейство refresh-токенов) в отдельном
+# ключе и удаляет его при выходе или повторном использовании refresh-токена
+SESSION_PREFIX = "refresh:"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VerifierStats:
+    verified: int = 0
+    cached: int = 0
+    rejected: int = 0
+    revocation_checks: int = 0
+    revocation_cached: int = 0
+    revocation_errors: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class AccessTokenVerifier:
+    def __init__(
+        self,
+        keys: PublicKeyCache,
+        cache: Redis,
+        algorithm: str,
+        cookie_name: str,
+        leeway: int = 0,
+        cache_maxsize: int = 10_000,
+        revocation_maxsize: int = 10_000,
+        revocation_ttl: float = 5.0,
+        fail_open: bool = False,
+    ) -> None:
+        self.keys = keys
+        self.cache = cache
+        self.algorithm = algorithm
+        self.cookie_name = cookie_name
+        self.leeway = leeway
+        self.fail_open = fail_open
+        self.stats = VerifierStats()
+
+        self.token_cache = TTLCache(maxsize=cache_maxsize, ttl=float("inf"))
+        self.revocation_cache = TTLCache(
+            maxsize=revocation_maxsize,
+            ttl=revocation_ttl,
+        )
+
+    def _extract(self, request: Request) -> str | None:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            return token
+
+        return request.cookies.get(self.cookie_name)
+
+    async def _decode(self, token: str) -> dict[str, Any]:
+        key = hashlib.sha256(token.encode()).digest()
+
+        payload = self.token_cache.get(key)
+        if payload is not None:
+            self.stats.cached += 1
+            return payload
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = await self.keys.get(kid)
+        if public_key is None:
+            raise jwt.InvalidKeyError(f"Неизвестный kid '{kid}'")
+
+        payload = jwt.decode(
+            token,
+            key=public_key,
+            algorithms=[self.algorithm],
+            leeway=self.leeway,
+            options={"require": ["exp", "sub", "jti"]},
+        )
+        if payload.get("type") != "access":
+            raise jwt.InvalidTokenError("Ожидался access токен")
+
+        ttl = payload["exp"] + self.leeway - time.time()
+        if ttl > 0:
+            self.token_cache.set(key, payload, ttl=ttl)
+
+        self.stats.verified += 1
+
+        return payload
+
+    async def is_revoked(self, payload: dict[str, Any]) -> bool:
+        family = payload.get("fam")
+        if family is None:
+            # токены без семейства выпущены до его появления и скоро истекут
+            return False
+
+        key = f"{SESSION_PREFIX}{payload['sub']}:{family}"
+
+        revoked = self.revocation_cache.get(key)
+        if revoked is not None:
+            self.stats.revocation_cached += 1
+            return revoked
+
+        self.stats.revocation_checks += 1
+        try:
+            revoked = not await self.cache.exists(key)
+        except RedisError as e:
+            self.stats.revocation_errors += 1
+            logger.warning(f"Не удалось проверить отзыв сессии: {e!r}")
+
+            if self.fail_open:
+                return False
+
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис временно недоступен, повторите попытку позже.",
+                headers={"Retry-After": "1"},
+            )
+
+        # отозванная сессия не возвращается, держим до истечения токена
+        ttl = payload["exp"] - time.time() if revoked else None
+        self.revocation_cache.set(key, revoked, ttl=ttl)
+
+        return revoked
+
+    async def __call__(self, request: Request) -> dict[str, Any]:
+        token = self._extract(request)
+        if token is None:
+            self.stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Токена нет, заново войдите в систему",
+            )
+
+        try:
+            payload = await self._decode(token)
+        except jwt.PyJWTError:
+            self.stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Токен не валиден.",
+            )
+
+        if await self.is_revoked(payload):
+            self.stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Токен не действителен.",
+            )
+
+        return payload
+
+
+public_keys = PublicKeyCache(
+    jwks_url=settings.JWT_JWKS_URL,
+    public_key_path=settings.JWT_PUBLIC_KEY_PATH,
+    refresh_interval=settings.JWT_JWKS_REFRESH_INTERVAL,
+    min_refresh_interval=settings.JWT_JWKS_MIN_REFRESH_INTERVAL,
+    timeout=settings.JWT_JWKS_TIMEOUT,
+)
+
+access_token_verifier = AccessTokenVerifier(
+    keys=public_keys,
+    cache=redis_client,
+    algorithm=settings.JWT_ALGORITHM,
+    cookie_name=settings.JWT_ACCESS_COOKIE_NAME,
+    leeway=settings.JWT_LEEWAY,
+    cache_maxsize=settings.JWT_CACHE_MAXSIZE,
+    revocation_maxsize=settings.REVOCATION_CACHE_MAXSIZE,
+    revocation_ttl=settings.REVOCATION_CACHE_TTL,
+    fail_open=settings.REVOCATION_FAIL_OPEN,
+)
@@ -0,0 +1,93 @@
+import time
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Hashable
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        total = self.hits + self.misses
+        data["hit_rate"] = self.hits / total if total else 0.0
+        return data
+
+
+class TTLCache:
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+
+        if item is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = item
+
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+    ) -> None:
+        if not self.enabled:
+            return
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        if self._data.pop(key, None) is not None:
+            self.stats.invalidations += 1
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> None:
+        keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+
+        for key in keys:
+            del self._data[key]
+
+        self.stats.invalidations += len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
@@ -1,11 +1,12 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from .engine import create_engine
 from .settings import settings
 
-engine = create_async_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL)
 
 Session = async_sessionmaker(engine, expire_on_commit=False)
 
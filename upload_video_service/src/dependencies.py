@@ -1,8 +1,37 @@
-from typing import Annotated
+import hmac
 
-from fastapi import Depends
+from typing import Annotated, Any
+
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .auth import access_token_verifier
 from .db import get_session
+from .settings import settings
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+AccessTokenDep = Annotated[dict[str, Any], Depends(access_token_verifier)]
+
+
+async def get_current_user_id(token: AccessTokenDep) -> int:
+    return int(token["sub"])
+
+
+CurrentUserIdDep = Annotated[int, Depends(get_current_user_id)]
+
+
+async def require_metrics_token(request: Request) -> None:
+    # метрики раскрывают внутреннее состояние сервиса, поэтому отдаются
+    # только по общему с системой мониторинга токену; без токена их нет
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(),
+        settings.METRICS_TOKEN.encode(),
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+
+MetricsAccessDep = Depends(require_metrics_token)
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import logging
+import time
+import urllib.request
+
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from jwt import PyJWKSet
+
+logger = logging.getLogger(__name__)
+
+
+class PublicKeyCache:
+    def __init__(
+        self,
+        jwks_url: str,
+        public_key_path: str = "",
+        refresh_interval: int = 300,
+        min_refresh_interval: int = 10,
+        timeout: float = 5.0,
+    ) -> None:
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.fetches = 0
+
+        self._static_key = None
+        self._keys: dict[str, Any] = {}
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+        if public_key_path:
+            with open(public_key_path, "rb") as f:
+                self._static_key = serialization.load_pem_public_key(f.read())
+
+    def _age(self) -> float:
+        return time.monotonic() - self._fetched_at
+
+    async def get(self, kid: str | None):
+        if self._static_key is not None:
+            return self._static_key
+
+        if kid is None:
+            return None
+
+        key = self._keys.get(kid)
+        if key is not None and self._age() < self.refresh_interval:
+            return key
+
+        async with self._lock:
+            key = self._keys.get(kid)
+            stale = self._age() >= self.refresh_interval
+            # неизвестный kid перечитываем не чаще min_refresh_interval
+            if stale or (key is None and self._age() >= self.min_refresh_interval):
+                await self._refresh()
+
+        return self._keys.get(kid)
+
+    async def _refresh(self) -> None:
+        try:
+            data = await asyncio.to_thread(self._fetch)
+            jwk_set = PyJWKSet.from_dict(data)
+        except Exception:
+            logger.exception("Не удалось получить JWKS, оставлены прежние ключи")
+            # повторная попытка не раньше чем через min_refresh_interval
+            self._fetched_at = (
+                time.monotonic() - self.refresh_interval + self.min_refresh_interval
+            )
+            return
+
+        self._keys = {jwk.key_id: jwk.key for jwk in jwk_set.keys}
+        self._fetched_at = time.monotonic()
+        self.fetches += 1
+
+    def _fetch(self) -> dict:
+        with urllib.request.urlopen(self.jwks_url, timeout=self.timeout) as response:
+            return json.load(response)
@@ -18,6 +18,10 @@ class StatusEnum(enum.Enum):
 class VideoModel(Base):
     __tablename__ = "videos_metadata"
 
+    user_id: Mapped[int] = mapped_column(
+        nullable=True,
+        index=True,
+    )
     title: Mapped[str] = mapped_column(
         String(255),
         nullable=True,
@@ -0,0 +1,18 @@
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from .settings import settings
+
+redis_pool = BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+)
+
+redis_client = Redis(connection_pool=redis_pool)
+
+
+async def close_redis() -> None:
+    await redis_client.aclose()
+    await redis_pool.disconnect()
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from .dependencies import CurrentUserIdDep
 from .schemas import InitVideoSchema
 from .services import VideoServiceDep
 from .utils import generate_upload_path
@@ -10,12 +11,16 @@ router = APIRouter()
 @router.post("/init")
 async def init_video(
     payload: InitVideoSchema,
+    user_id: CurrentUserIdDep,
     video_service: VideoServiceDep,
 ):
     upload_path = generate_upload_path()
     upload_path.resolve().mkdir(exist_ok=True, parents=True)
 
-    data = payload.model_dump() | {"upload_path": str(upload_path)}
+    data = payload.model_dump() | {
+        "upload_path": str(upload_path),
+        "user_id": user_id,
+    }
 
     video = await video_service.create(data)
 
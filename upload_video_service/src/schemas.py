@@ -12,6 +12,8 @@ class InitVideoSchema(BaseModel):
 
 class VideoSchema(InitVideoSchema):
     id: int
+    # у видео, загруженных до привязки к пользователю, владельца нет
+    user_id: int | None
     upload_path: int
     created_at: datetime
     status: StatusEnum
@@ -6,7 +6,47 @@ ROOT_DIR = Path(__file__).resolve().parent.parent
 
 
 class Settings(BaseSettings):
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8001
+    SERVER_WORKERS: int = 1
+    SERVER_BACKLOG: int = 2048
+    SERVER_ACCESS_LOG: bool = True
+
     DATABASE_URL: str = f"sqlite+aiosqlite:///{ROOT_DIR}/db.sqlite3"
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT: int = 5000
+
+    JWT_ALGORITHM: str = "RS256"
+    JWT_ACCESS_COOKIE_NAME: str = "access_token"
+    JWT_JWKS_URL: str = "http://auth_service:8000/.well-known/jwks.json"
+    JWT_PUBLIC_KEY_PATH: str = ""
+    JWT_JWKS_REFRESH_INTERVAL: int = 300
+    JWT_JWKS_MIN_REFRESH_INTERVAL: int = 10
+    JWT_JWKS_TIMEOUT: float = 5.0
+    JWT_LEEWAY: int = 0
+    JWT_CACHE_MAXSIZE: int = 10_000
+
+    REDIS_URL: str = "redis://redis:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+
+    REVOCATION_CACHE_MAXSIZE: int = 10_000
+    REVOCATION_CACHE_TTL: float = 5.0
+    REVOCATION_FAIL_OPEN: bool = False
+
+    METRICS_TOKEN: str = ""
+
 
 settings = Settings()
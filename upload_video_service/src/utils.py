@@ -1,4 +1,5 @@
 import uuid
+
 from pathlib import Path
 
 